@@ -0,0 +1,143 @@
+"""
+High-rate ADC sampling for Freezer Inventory System
+A background thread reads the MQ gas sensor channels of the ADS1115 many
+times a second into fixed-size NumPy ring buffers; each reporting interval
+the sensor daemon takes one summary per metric instead of a single noisy
+instantaneous value. Samples accumulate until a reading carrying their
+summary is actually transmitted, so readings suppressed by the deadband
+never discard a spike
+"""
+
+import logging
+import threading
+import time
+from metrics import Counter, Gauge
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ADC_SAMPLES = Counter('adc_samples_total', 'ADC conversions read by the sampling thread', ['metric'])
+ADC_READ_ERRORS = Counter('adc_read_errors_total', 'ADC conversions that failed', ['metric'])
+ADC_SAMPLE_RATE = Gauge('adc_samples_per_second', 'Achieved conversions per second per metric', ['metric'])
+
+
+class RingBuffer:
+    """Most recent `capacity` float samples, overwriting the oldest"""
+
+    def __init__(self, capacity):
+        self._data = np.empty(capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self.total = 0  # Samples ever appended
+
+    def append(self, value):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % len(self._data)
+        self._count = min(self._count + 1, len(self._data))
+        self.total += 1
+
+    def values(self):
+        """Samples held, oldest first"""
+        if self._count < len(self._data):
+            return self._data[:self._count].copy()
+        return np.concatenate((self._data[self._next:], self._data[:self._next]))
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+
+def summarize(values):
+    """min/max/mean/median/stddev/count of an array of samples, or None when empty"""
+    if len(values) == 0:
+        return None
+    return {
+        'min': round(float(values.min()), 3),
+        'max': round(float(values.max()), 3),
+        'mean': round(float(values.mean()), 3),
+        'median': round(float(np.median(values)), 3),
+        'stddev': round(float(values.std()), 3),
+        'count': int(len(values))
+    }
+
+
+class AdcSampler:
+    """Reads each channel in turn at `rate_hz` and buffers the converted values
+
+    `channels` maps a metric name to (channel, convert), where `convert`
+    turns the channel's (raw_value, voltage) into the stored value. All
+    channels are read from this one thread, since they share the I2C bus.
+    """
+
+    def __init__(self, channels, rate_hz=50, window_seconds=600):
+        self.channels = channels
+        self.rate_hz = rate_hz
+        capacity = max(1, int(rate_hz * window_seconds))
+        self.buffers = {metric: RingBuffer(capacity) for metric in channels}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._since = time.monotonic()
+        self._seen = {metric: 0 for metric in channels}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='adc-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def summaries(self):
+        """Per metric, (summary of the samples since the last commit(), median of those since the last call)
+
+        The median is the current value; the summary covers the whole
+        reporting interval, up to `window_seconds` of it.
+        """
+        with self._lock:
+            held = {metric: buffer.values() for metric, buffer in self.buffers.items()}
+            recent = {metric: buffer.total - self._seen[metric] for metric, buffer in self.buffers.items()}
+            self._seen = {metric: buffer.total for metric, buffer in self.buffers.items()}
+            now = time.monotonic()
+            elapsed, self._since = now - self._since, now
+        result = {}
+        for metric, values in held.items():
+            if elapsed > 0:
+                ADC_SAMPLE_RATE.labels(metric).set(recent[metric] / elapsed)
+            latest = values[len(values) - min(recent[metric], len(values)):]
+            result[metric] = (summarize(values), round(float(np.median(latest)), 3) if len(latest) else None)
+        return result
+
+    def commit(self):
+        """Start a new reporting interval once a reading carrying the summaries has been sent"""
+        with self._lock:
+            for buffer in self.buffers.values():
+                buffer.clear()
+
+    def _run(self):
+        period = 1.0 / self.rate_hz
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            for metric, (channel, convert) in self.channels.items():
+                try:
+                    value = convert(channel.value, channel.voltage)
+                except Exception as e:
+                    ADC_READ_ERRORS.labels(metric).inc()
+                    logger.warning(f"ADC read failed for {metric}: {e}")
+                    continue
+                with self._lock:
+                    self.buffers[metric].append(value)
+                ADC_SAMPLES.labels(metric).inc()
+            next_at += period
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Running behind (slow bus): skip the missed slots rather than bursting
+                next_at = time.monotonic()
@@ -0,0 +1,211 @@
+"""
+Streaming anomaly detection for Freezer Inventory System
+Scores each incoming sensor reading against an exponentially weighted
+baseline kept per device and metric, in constant time and memory. The
+baselines can live in a SQLite file, so every worker process scores a
+device against the same baseline and it survives restarts
+"""
+
+import contextlib
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class MetricBaseline:
+    """EWMA mean/variance and smoothed trend for one metric on one device"""
+
+    __slots__ = ('mean', 'var', 'smoothed', 'count', 'last_time')
+
+    def __init__(self, value, timestamp):
+        self.mean = value
+        self.var = 0.0
+        self.smoothed = value
+        self.count = 1
+        self.last_time = timestamp
+
+    @classmethod
+    def from_row(cls, mean, var, smoothed, count, last_time):
+        baseline = cls.__new__(cls)
+        baseline.mean, baseline.var, baseline.smoothed, baseline.count = mean, var, smoothed, count
+        baseline.last_time = datetime.fromisoformat(last_time)
+        return baseline
+
+    def to_dict(self):
+        return {
+            'mean': self.mean,
+            'stddev': math.sqrt(self.var),
+            'smoothed': self.smoothed,
+            'count': self.count,
+            'last_time': self.last_time.isoformat()
+        }
+
+
+class AnomalyDetector:
+    """Flag spikes (z-score) and fast build-ups (rate of change) per metric
+
+    With `state_path`, baselines are read and updated in a SQLite (WAL) file
+    under a write lock, one transaction per reading; without it they are
+    kept in this process only.
+    """
+
+    METRICS = ('co2_ppm', 'ammonia_ppm', 'h2s_ppm')
+
+    def __init__(self, alpha=0.05, smoothing=0.3, z_threshold=4.0, warmup=10,
+                 rate_thresholds=None, min_rate_seconds=5.0, min_stddev=None, state_path=None):
+        self.alpha = alpha
+        self.smoothing = smoothing
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        # Readings closer together than this are rated over this window instead
+        self.min_rate_seconds = min_rate_seconds
+        # Maximum rise/fall of the smoothed value, in units per minute
+        self.rate_thresholds = rate_thresholds or {
+            'co2_ppm': 100.0,
+            'ammonia_ppm': 2.0,
+            'h2s_ppm': 1.0
+        }
+        # Floor under the baseline spread, about the sensors' resolution, so a
+        # metric that sat perfectly still during warmup can still be flagged
+        self.min_stddev = min_stddev or {
+            'co2_ppm': 5.0,
+            'ammonia_ppm': 0.1,
+            'h2s_ppm': 0.05
+        }
+        self._baselines = {}
+        self._lock = threading.Lock()
+        self.state_path = state_path
+        self._local = threading.local()
+        if state_path:
+            directory = os.path.dirname(state_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connect().execute('''
+                CREATE TABLE IF NOT EXISTS baseline (
+                    device_id TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    mean REAL NOT NULL,
+                    var REAL NOT NULL,
+                    smoothed REAL NOT NULL,
+                    count INTEGER NOT NULL,
+                    last_time TEXT NOT NULL,
+                    PRIMARY KEY (device_id, metric)
+                )
+            ''')
+
+    def _connect(self):
+        """Connection owned by the current thread and process"""
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.state_path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            # Losing the last update on power loss only nudges a baseline
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextlib.contextmanager
+    def _device_baselines(self, device_id):
+        """{(device_id, metric): MetricBaseline} for one device, written back when the block ends"""
+        if not self.state_path:
+            with self._lock:
+                yield self._baselines
+            return
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            baselines = {(device_id, metric): MetricBaseline.from_row(*row) for metric, *row in db.execute(
+                'SELECT metric, mean, var, smoothed, count, last_time FROM baseline WHERE device_id = ?', (device_id,))}
+            yield baselines
+            db.executemany('INSERT OR REPLACE INTO baseline (device_id, metric, mean, var, smoothed, count, last_time) '
+                           'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                           [(device, metric, b.mean, b.var, b.smoothed, b.count, b.last_time.isoformat())
+                            for (device, metric), b in baselines.items()])
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def score(self, device_id, reading, timestamp=None):
+        """Update baselines with a reading and return its anomaly flags"""
+        timestamp = timestamp or datetime.utcnow()
+        flags = []
+
+        with self._device_baselines(device_id) as baselines:
+            for metric in self.METRICS:
+                value = reading.get(metric)
+                if value is None:
+                    continue
+                flag = self._update(baselines, device_id, metric, float(value), timestamp)
+                if flag:
+                    flags.append(flag)
+
+        return flags
+
+    def _update(self, baselines, device_id, metric, value, timestamp):
+        key = (device_id, metric)
+        baseline = baselines.get(key)
+        if baseline is None:
+            baselines[key] = MetricBaseline(value, timestamp)
+            return None
+
+        reasons = []
+        stddev = max(math.sqrt(baseline.var), self.min_stddev.get(metric, 0.0))
+        z_score = (value - baseline.mean) / stddev if stddev > 0 else 0.0
+        warmed_up = baseline.count >= self.warmup
+
+        if warmed_up and abs(z_score) > self.z_threshold:
+            reasons.append('z_score')
+            # Clip the outlier so a single spike does not drag the baseline
+            limit = self.z_threshold * stddev
+            value_for_baseline = baseline.mean + math.copysign(limit, value - baseline.mean)
+        else:
+            value_for_baseline = value
+
+        # Rate of change is measured on the smoothed value to ignore MQ noise
+        previous_smoothed = baseline.smoothed
+        baseline.smoothed += self.smoothing * (value - baseline.smoothed)
+        elapsed = (timestamp - baseline.last_time).total_seconds()
+        rate = (baseline.smoothed - previous_smoothed) * 60.0 / max(elapsed, self.min_rate_seconds)
+        threshold = self.rate_thresholds.get(metric)
+        if warmed_up and threshold is not None and abs(rate) > threshold:
+            reasons.append('rate_of_change')
+
+        diff = value_for_baseline - baseline.mean
+        increment = self.alpha * diff
+        baseline.mean += increment
+        baseline.var = (1 - self.alpha) * (baseline.var + diff * increment)
+        baseline.count += 1
+        baseline.last_time = timestamp
+
+        if not reasons:
+            return None
+
+        return {
+            'metric': metric,
+            'value': value,
+            'baseline': baseline.mean,
+            'z_score': round(z_score, 2),
+            'rate_per_min': round(rate, 3),
+            'reasons': reasons
+        }
+
+    def baselines(self, device_id=None):
+        """Return the current baseline for every tracked device and metric"""
+        if self.state_path:
+            rows = self._connect().execute(
+                'SELECT device_id, metric, mean, var, smoothed, count, last_time FROM baseline '
+                'WHERE ? IS NULL OR device_id = ?', (device_id, device_id)).fetchall()
+            current = {(device, metric): MetricBaseline.from_row(*row) for device, metric, *row in rows}
+        else:
+            with self._lock:
+                current = dict(self._baselines)
+        result = {}
+        for (device, metric), baseline in current.items():
+            if device_id is not None and device != device_id:
+                continue
+            result.setdefault(device, {})[metric] = baseline.to_dict()
+        return result
@@ -0,0 +1,67 @@
+"""
+Fingerprinted static assets for Freezer Inventory System
+Resolves template asset names through the manifest written by build_static.py
+and serves the hashed files, precompressed when the browser accepts it, with
+an immutable cache lifetime
+"""
+
+import json
+import mimetypes
+import os
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+
+assets_bp = Blueprint('assets', __name__)
+
+# Hashed names change whenever their content does, so browsers may keep them forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def dist_dir(app):
+    return os.path.join(app.static_folder, 'dist')
+
+
+def load_manifest(app):
+    """Original name -> hashed name, or {} when the build has not been run"""
+    try:
+        with open(os.path.join(dist_dir(app), MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(filename):
+    """URL of a static file, fingerprinted when a build is available"""
+    hashed = current_app.extensions['asset_manifest'].get(filename)
+    if hashed:
+        return url_for('assets.dist_file', filename=hashed)
+    return url_for('static', filename=filename)
+
+
+@assets_bp.route('/static/dist/<path:filename>')
+def dist_file(filename):
+    """Serve a hashed asset, preferring a precompressed variant"""
+    directory = dist_dir(current_app)
+    accepted = request.accept_encodings
+    for encoding, suffix in ENCODINGS:
+        if accepted[encoding] and os.path.isfile(os.path.join(directory, filename + suffix)):
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename)
+
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def init_assets(app):
+    """Load the asset manifest and expose asset_url() to templates"""
+    app.extensions['asset_manifest'] = load_manifest(app)
+    app.add_template_global(asset_url)
+    app.register_blueprint(assets_bp)
@@ -0,0 +1,66 @@
+"""
+Background tasks for Freezer Inventory System
+Periodic jobs run in daemon threads owned by the current process, so they are
+started lazily in each gunicorn worker rather than in the preloading master
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Call a function every `interval` seconds in a daemon thread"""
+
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.last_run = None
+        self.last_error = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_running(self):
+        """Start the thread if this process does not have one yet"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._stop = threading.Event()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        """Run now instead of waiting for the rest of the interval"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self.run_once()
+
+    def run_once(self):
+        try:
+            self.func()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Error in background task {self.name}: {e}")
+        finally:
+            self.last_run = datetime.utcnow()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Serving throughput benchmark for Freezer Inventory System
+Hammers one URL with concurrent clients and reports requests/second and latency
+
+Compare the dev server and gunicorn on the same Pi:
+    python app.py                                   # dev server
+    python benchmarks/bench_serving.py --url http://localhost:5000/
+    gunicorn -c gunicorn.conf.py wsgi:app           # production server
+    python benchmarks/bench_serving.py --url http://localhost:5000/
+"""
+
+import argparse
+import statistics
+import threading
+import time
+import requests
+
+
+def run_client(url, deadline, latencies, errors, lock):
+    """Issue requests back to back on one keep-alive session until the deadline"""
+    session = requests.Session()
+    local_latencies = []
+    local_errors = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=30)
+            if response.status_code >= 400:
+                local_errors += 1
+        except requests.exceptions.RequestException:
+            local_errors += 1
+        local_latencies.append(time.perf_counter() - start)
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Freezer serving benchmark')
+    parser.add_argument('--url', default='http://localhost:5000/',
+                       help='URL to request')
+    parser.add_argument('--concurrency', type=int, default=8,
+                       help='Number of concurrent clients')
+    parser.add_argument('--duration', type=float, default=30,
+                       help='Benchmark duration in seconds')
+    args = parser.parse_args()
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    threads = [
+        threading.Thread(target=run_client, args=(args.url, deadline, latencies, errors, lock))
+        for _ in range(args.concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if not latencies:
+        print("No requests completed")
+        return
+
+    print(f"URL:          {args.url}")
+    print(f"Concurrency:  {args.concurrency}")
+    print(f"Requests:     {len(latencies)} ({errors[0]} errors)")
+    print(f"Throughput:   {len(latencies) / elapsed:.1f} req/s")
+    print(f"Latency p50:  {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"Latency p95:  {percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"Latency max:  {max(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
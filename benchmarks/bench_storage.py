@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Storage backend benchmark for Freezer Inventory System
+Times the same storage operations through the Supabase REST client and
+through direct Postgres connections, configured as for the app
+
+    SUPABASE_URL=... SUPABASE_KEY=... POSTGRES_DSN=postgresql://... \\
+        python benchmarks/bench_storage.py --iterations 50 --writes
+
+Writes add rows with device_id 'benchmark' to sensor_data, so they are
+only run with --writes.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from storage import PostgresStorage, SupabaseStorage
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def reading(offset):
+    return {
+        'device_id': 'benchmark',
+        'timestamp': (datetime.utcnow() - timedelta(milliseconds=offset)).isoformat(),
+        'co2_ppm': 400 + offset % 50,
+        'ammonia_ppm': 1.5,
+        'h2s_ppm': 0.2,
+        'door_open': False,
+        'air_quality': 'good',
+        'is_anomaly': False,
+        'anomalies': []
+    }
+
+
+def time_operation(func, iterations):
+    """Per-call latencies in milliseconds, after one untimed warm-up call"""
+    func()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Freezer storage backend benchmark')
+    parser.add_argument('--backends', default='supabase,postgres',
+                       help='Comma-separated backends to compare')
+    parser.add_argument('--iterations', type=int, default=50,
+                       help='Timed calls per operation')
+    parser.add_argument('--batch', type=int, default=200,
+                       help='Readings per bulk insert')
+    parser.add_argument('--writes', action='store_true',
+                       help='Also time single and bulk sensor inserts')
+    args = parser.parse_args()
+
+    backends = {}
+    for name in args.backends.split(','):
+        if name == 'supabase':
+            backends[name] = SupabaseStorage(Config.SUPABASE_URL, Config.SUPABASE_KEY, timeout=Config.STORAGE_TIMEOUT)
+        elif name == 'postgres':
+            if not Config.POSTGRES_DSN:
+                print("Skipping postgres: POSTGRES_DSN is not set")
+                continue
+            backends[name] = PostgresStorage(Config.POSTGRES_DSN, timeout=Config.STORAGE_TIMEOUT)
+        else:
+            parser.error(f"Unknown backend: {name}")
+
+    since = (datetime.utcnow() - timedelta(hours=24)).isoformat()
+    operations = [
+        ('ping', lambda storage: storage.ping),
+        ('latest_sensor', lambda storage: lambda: storage.latest_sensor(since)),
+        ('list_items', lambda storage: storage.list_items),
+        ('sensor_history_24h', lambda storage: lambda: sum(len(page) for page in storage.iter_sensor_history(since, Config.JSON_STREAM_PAGE_SIZE)))
+    ]
+    if args.writes:
+        operations += [
+            ('insert_sensor', lambda storage: lambda: storage.insert_sensor(reading(0))),
+            (f'insert_sensors_x{args.batch}', lambda storage: lambda: storage.insert_sensors([reading(i) for i in range(args.batch)]))
+        ]
+
+    print(f"{'operation':<24} {'backend':<10} {'median ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for operation, build in operations:
+        for name, storage in backends.items():
+            try:
+                latencies = time_operation(build(storage), args.iterations)
+            except Exception as e:
+                print(f"{operation:<24} {name:<10} failed: {e}")
+                continue
+            print(f"{operation:<24} {name:<10} {statistics.median(latencies):>10.1f} "
+                  f"{percentile(latencies, 95):>10.1f} {max(latencies):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
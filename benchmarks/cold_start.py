@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Cold-start profile for Freezer Inventory System
+Breaks down `python -X importtime -c "import app"` and times a fresh
+interpreter from launch to the first response, against a budget
+
+Usage:
+    VERCEL=1 python benchmarks/cold_start.py
+    VERCEL=1 python benchmarks/cold_start.py --budget-ms 400 --runs 10 --path /touch
+The budget applies to the route given with --path (default `/`), requested
+with the environment the script runs in. Exits with status 1 when the
+median cold start exceeds the budget or the route answers with a 5xx.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Target for interpreter start + import + first request on a warm disk cache
+DEFAULT_BUDGET_MS = float(os.environ.get('COLD_START_BUDGET_MS', 300))
+
+FIRST_REQUEST = (
+    "import sys\n"
+    "import app\n"
+    "response = app.app.test_client().get({path!r})\n"
+    "response.get_data()\n"
+    "sys.exit(3 if response.status_code >= 500 else 0)\n"
+)
+
+
+def import_profile():
+    """Return (module, self_us, cumulative_us, depth) rows for `import app`"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def cold_start_ms(path):
+    """Wall time of a fresh interpreter importing the app and serving one request"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', FIRST_REQUEST.format(path=path)],
+        cwd=REPO_ROOT, capture_output=True
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode == 3:
+        sys.exit(f"{path} answered with a server error; a failing route cannot meet the budget")
+    if result.returncode != 0:
+        sys.exit(f"First request to {path} failed:\n{result.stderr.decode('utf-8', 'replace')}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Freezer cold-start profile')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                       help='Cold-start budget in milliseconds')
+    parser.add_argument('--runs', type=int, default=5,
+                       help='Number of cold starts to time')
+    parser.add_argument('--path', default='/',
+                       help='Route requested after the import')
+    parser.add_argument('--top', type=int, default=15,
+                       help='Number of modules to list')
+    args = parser.parse_args()
+
+    rows = import_profile()
+    # importtime lists children before their parent, so app.py's direct
+    # imports are the depth-1 rows between the previous top-level row and app
+    app_index = next(i for i, row in enumerate(rows) if row[0] == 'app' and row[3] == 0)
+    first_index = max((i for i, row in enumerate(rows[:app_index]) if row[3] == 0), default=-1) + 1
+    app_row = rows[app_index]
+    direct = [row for row in rows[first_index:app_index] if row[3] == 1]
+
+    print("=== import app (python -X importtime) ===")
+    print(f"Total: {app_row[2] / 1000:.1f} ms")
+    print("\nDirect imports of app.py by cumulative time:")
+    for name, _, cumulative_us, _ in sorted(direct, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    print("\nSlowest modules by self time:")
+    for name, self_us, _, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    timings = [cold_start_ms(args.path) for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(f"\n=== Cold start to first response ({args.path}) ===")
+    print(f"Runs: {args.runs}  median: {median:.0f} ms  min: {min(timings):.0f} ms  max: {max(timings):.0f} ms")
+    over = median > args.budget_ms
+    print(f"Budget for {args.path}: {args.budget_ms:.0f} ms -> {'OVER BUDGET' if over else 'OK'}")
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
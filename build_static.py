@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Static asset build for Freezer Inventory System
+Copies everything under static/ to static/dist/ with a content hash in the
+file name, writes gzip and brotli variants next to each file and a
+manifest.json the templates use to look up the hashed names
+
+Run after changing anything in static/:
+    python build_static.py
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    print("Warning: brotli not available - only gzip variants will be written")
+    BROTLI_AVAILABLE = False
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'  # Read by assets.load_manifest()
+
+
+def hashed_name(relative_path, content):
+    """dashboard.js -> dashboard.<hash>.js"""
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    root, ext = os.path.splitext(relative_path)
+    return f"{root}.{digest}{ext}"
+
+
+def write_compressed(path, content):
+    """Write .gz/.br variants when they are actually smaller than the original"""
+    written = []
+    gz = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(gz) < len(content):
+        with open(path + '.gz', 'wb') as f:
+            f.write(gz)
+        written.append('gz')
+    if BROTLI_AVAILABLE:
+        br = brotli.compress(content, quality=11)
+        if len(br) < len(content):
+            with open(path + '.br', 'wb') as f:
+                f.write(br)
+            written.append('br')
+    return written
+
+
+def build():
+    """Rebuild static/dist from scratch and return the manifest"""
+    if os.path.exists(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    manifest = {}
+    for root, dirs, files in os.walk(STATIC_DIR):
+        if os.path.abspath(root).startswith(DIST_DIR):
+            continue
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != DIST_DIR]
+        for filename in sorted(files):
+            source = os.path.join(root, filename)
+            relative_path = os.path.relpath(source, STATIC_DIR).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                content = f.read()
+
+            target_name = hashed_name(relative_path, content)
+            target = os.path.join(DIST_DIR, *target_name.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(content)
+            variants = write_compressed(target, content)
+
+            manifest[relative_path] = target_name
+            print(f"✓ {relative_path} -> dist/{target_name} {' '.join(variants)}")
+
+    with open(os.path.join(DIST_DIR, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+if __name__ == "__main__":
+    manifest = build()
+    print(f"Built {len(manifest)} assets into {DIST_DIR}")
@@ -0,0 +1,84 @@
+"""
+In-process cache for Freezer Inventory System
+Short-lived values shared by the request threads of one worker
+"""
+
+import threading
+import time
+from metrics import Counter, Gauge
+
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by result', ['cache', 'result'])
+CACHE_HIT_RATIO = Gauge('cache_hit_ratio', 'Share of cache lookups served from the cache', ['cache'])
+
+
+class TTLCache:
+    """Thread-safe key/value cache whose entries expire after a fixed time"""
+
+    def __init__(self, ttl, name='default'):
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._hit_counter = CACHE_REQUESTS.labels(name, 'hit')
+        self._miss_counter = CACHE_REQUESTS.labels(name, 'miss')
+        CACHE_HIT_RATIO.labels(name).set_function(self.hit_ratio)
+
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        """Return the cached value, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self.misses += 1
+                self._miss_counter.inc()
+                return None
+            self.hits += 1
+            self._hit_counter.inc()
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires)
+
+    def get_or_load(self, key, loader, ttl=None):
+        """Return the cached value, calling loader once on a miss
+
+        Concurrent misses on the same key wait for a single load instead of
+        all hitting storage at once.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] >= time.monotonic():
+                    return entry[0]
+            value = loader()
+            self.set(key, value, ttl)
+            return value
+
+    def status(self):
+        """Seconds left on each live entry and the hit ratio, without counting as lookups"""
+        now = time.monotonic()
+        with self._lock:
+            entries = {key: round(expires - now, 1) for key, (_, expires) in self._entries.items() if expires >= now}
+        return {'entries': entries, 'hit_ratio': round(self.hit_ratio(), 3)}
+
+    def invalidate(self, *keys):
+        """Drop the given keys, or everything when no key is given"""
+        with self._lock:
+            if not keys:
+                self._entries.clear()
+            for key in keys:
+                self._entries.pop(key, None)
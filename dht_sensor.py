@@ -0,0 +1,93 @@
+"""
+DHT22 temperature and humidity for Freezer Inventory System
+DHT reads take seconds and fail often, so a background thread polls the
+sensor and keeps the last good value; the sampling loop only ever reads
+that cached value and never waits on the sensor
+"""
+
+import logging
+import threading
+import time
+from metrics import Counter, Gauge
+
+try:
+    import board
+    import adafruit_dht
+    DHT_AVAILABLE = True
+except ImportError:
+    DHT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DHT_READS = Counter('dht_reads_total', 'DHT22 read attempts', ['result'])
+DHT_AGE = Gauge('dht_reading_age_seconds', 'Age of the last good temperature/humidity reading')
+
+
+class DhtReader:
+    """Polls a DHT22 every `poll_interval` seconds and caches the last good reading"""
+
+    def __init__(self, pin, poll_interval=3.0, max_age=60.0):
+        self.pin = pin
+        # The DHT22 cannot be read more often than every 2 seconds
+        self.poll_interval = max(poll_interval, 2.0)
+        self.max_age = max_age
+        self._device = None
+        self._last = None  # (temperature_c, humidity_pct, monotonic time)
+        self._stop = threading.Event()
+        self._thread = None
+        DHT_AGE.set_function(lambda: time.monotonic() - self._last[2] if self._last else float('nan'))
+
+    def start(self):
+        """Start polling; returns False when the sensor cannot be used"""
+        if not DHT_AVAILABLE:
+            logger.warning("adafruit_dht not available - temperature and humidity will be disabled")
+            return False
+        try:
+            self._device = adafruit_dht.DHT22(getattr(board, f'D{self.pin}'), use_pulseio=False)
+        except Exception as e:
+            logger.error(f"Error setting up DHT22 on GPIO {self.pin}: {e}")
+            return False
+        self._thread = threading.Thread(target=self._run, name='dht-reader', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._device is not None:
+            self._device.exit()
+
+    def latest(self):
+        """(temperature_c, humidity_pct, age_seconds), with Nones when no recent reading"""
+        last = self._last
+        if last is None:
+            return None, None, None
+        age = time.monotonic() - last[2]
+        if age > self.max_age:
+            return None, None, age
+        return last[0], last[1], age
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.read_once()
+            self._stop.wait(self.poll_interval)
+
+    def read_once(self):
+        try:
+            temperature = self._device.temperature
+            humidity = self._device.humidity
+        except RuntimeError as e:
+            # Checksum errors and missed pulses are routine; the next poll retries
+            DHT_READS.labels('retry').inc()
+            logger.debug(f"DHT22 read failed: {e}")
+            return
+        except Exception as e:
+            DHT_READS.labels('error').inc()
+            logger.error(f"Error reading DHT22: {e}")
+            return
+        if temperature is None or humidity is None:
+            DHT_READS.labels('retry').inc()
+            return
+        DHT_READS.labels('ok').inc()
+        self._last = (round(temperature, 1), round(humidity, 1), time.monotonic())
@@ -0,0 +1,57 @@
+"""
+Door event statistics for Freezer Inventory System
+Turns the open/close edges recorded by the sensor daemon into open intervals
+and per-day totals
+"""
+
+from datetime import timedelta
+
+
+def open_intervals(events, start, end, open_at_start=False):
+    """(opened, closed, started_in_window) for time-ordered (time, state) edges
+
+    A door open at `start` is treated as opened then, and one still open at
+    `end` as closed then. Repeated edges of the same state are ignored.
+    """
+    intervals = []
+    opened = start if open_at_start else None
+    started_in_window = not open_at_start
+    for at, state in events:
+        if at > end:
+            break
+        if state == 'open':
+            if opened is None:
+                opened = max(at, start)
+                started_in_window = True
+        elif opened is not None:
+            intervals.append((opened, at, started_in_window))
+            opened = None
+    if opened is not None:
+        intervals.append((opened, end, started_in_window))
+    return intervals
+
+
+def daily_stats(intervals, first_day, days):
+    """Open count and open seconds per UTC day, oldest first
+
+    An opening is counted on the day it started, unless it started before
+    the window; its duration is split across the days it spans.
+    """
+    totals = []
+    for offset in range(days):
+        day_start = first_day + timedelta(days=offset)
+        day_end = day_start + timedelta(days=1)
+        open_count = 0
+        open_seconds = 0.0
+        for opened, closed, started_in_window in intervals:
+            if started_in_window and day_start <= opened < day_end:
+                open_count += 1
+            overlap = (min(closed, day_end) - max(opened, day_start)).total_seconds()
+            if overlap > 0:
+                open_seconds += overlap
+        totals.append({
+            'date': day_start.date().isoformat(),
+            'open_count': open_count,
+            'open_seconds': round(open_seconds, 1)
+        })
+    return totals
@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for Freezer Inventory System
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+from config import ProductionConfig
+
+bind = f"{ProductionConfig.WEB_HOST}:{ProductionConfig.WEB_PORT}"
+
+# A Pi 3 has 4 cores and 1 GB RAM: two workers with a few threads each keep
+# memory low while Supabase round trips overlap inside every worker
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')  # or 'gevent'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))  # gevent only
+
+# Import the app once in the master and fork it into the workers. gevent
+# patches the standard library after the fork, so it loads per worker instead
+preload_app = worker_class != 'gevent'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 10
+keepalive = 5
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')  # e.g. '-' for stdout
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Make sure no worker reuses a storage client created in the master"""
+    from wsgi import app
+    app.extensions['storage'].reset()
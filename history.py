@@ -0,0 +1,55 @@
+"""
+Sensor history resampling for Freezer Inventory System
+The sensor daemon only transmits readings that changed, so stored rows are
+irregular; this turns them into one row per device per fixed step, holding
+each device's last reading until the next one arrives
+"""
+
+import math
+from datetime import timedelta
+
+
+def clamp_window(hours, step, max_hours, max_points):
+    """(hours, step) limited to max_hours, with step widened to at most max_points grid points
+
+    A missing or zero step (raw rows) is left as it is.
+    """
+    hours = min(max(hours, 1), max_hours)
+    if step:
+        step = max(step, 1, math.ceil(hours * 3600 / max_points))
+    return hours, step
+
+
+def step_resample(rows, start, end, step, parse_timestamp, max_age=None):
+    """Yield pages of rows on a regular grid from time-ordered readings
+
+    Each grid point from `start` to `end` gets, per device, a copy of the
+    latest reading at or before it, with `timestamp` set to the grid time and
+    `observed_at` to the original one. Rows before `start` only seed the
+    first points; a device whose last reading is older than `max_age` is
+    treated as silent rather than carried forward.
+    """
+    step = timedelta(seconds=step)
+    at = start
+    latest = {}
+
+    def points_until(limit):
+        nonlocal at
+        page = []
+        while at <= end and (limit is None or at < limit):
+            for device_id, (observed, row) in sorted(latest.items(), key=lambda item: str(item[0])):
+                if max_age is None or (at - observed).total_seconds() <= max_age:
+                    page.append(dict(row, timestamp=at.isoformat(), observed_at=row['timestamp']))
+            at += step
+        return page
+
+    for row in rows:
+        observed = parse_timestamp(row['timestamp'])
+        page = points_until(observed)
+        if page:
+            yield page
+        latest[row.get('device_id')] = (observed, row)
+
+    page = points_until(None)
+    if page:
+        yield page
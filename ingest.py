@@ -0,0 +1,124 @@
+"""
+Sensor ingest buffer for Freezer Inventory System
+Readings are acknowledged as soon as they are queued on local disk and are
+written to storage in batches, every few hundred milliseconds or whenever
+enough rows have accumulated, so database round trips grow with time
+rather than with the number of freezers posting
+"""
+
+import logging
+import os
+import time
+import tracing
+from background import PeriodicTask
+from metrics import Counter, Gauge, Histogram
+from storage import is_outage
+
+logger = logging.getLogger(__name__)
+
+FLUSH_ROWS = Histogram('ingest_flush_rows', 'Readings written per bulk insert',
+                       buckets=(1, 2, 5, 10, 25, 50, 100, 200, 500, 1000))
+FLUSH_LATENCY = Histogram('ingest_flush_seconds', 'Time to write one batch of readings')
+QUEUE_DEPTH = Gauge('ingest_queue_depth', 'Readings queued locally and not yet stored')
+READINGS_REJECTED = Counter('ingest_readings_rejected_total', 'Readings storage refused, moved to the dead-letter table')
+
+# Queued readings carry [trace_id, span_id] of the request that queued them
+# under this key, which is removed before the row is written
+TRACE_KEY = '_trace'
+
+
+def _untraced(reading):
+    return {key: value for key, value in reading.items() if key != TRACE_KEY}
+
+
+class IngestBuffer:
+    """Durable queue of readings drained by a per-process flush thread"""
+
+    def __init__(self, queue, write_batch, flush_interval=0.5, max_rows=200, on_flush=None, tracer=None):
+        self.queue = queue
+        self.write_batch = write_batch
+        self.max_rows = max_rows
+        self.on_flush = on_flush
+        self.tracer = tracer
+        self.task = PeriodicTask('ingest-flush', flush_interval, self.flush)
+        self._added = 0
+        QUEUE_DEPTH.set_function(lambda: len(self.queue))
+
+    def add(self, reading):
+        """Queue a reading on disk and return its queue ID
+
+        Inside a traced request the current span is stored with the reading,
+        so the batch insert that later stores it shows up in the same trace.
+        """
+        span = tracing.current_span()
+        if span is not None:
+            reading = dict(reading, **{TRACE_KEY: [span.trace_id, span.span_id]})
+        queue_id = self.queue.put(reading)
+        self._added += 1
+        if self._added >= self.max_rows:
+            self._added = 0
+            self.task.wake()
+        return queue_id
+
+    def flush(self):
+        """Write queued readings in batches of at most max_rows until none are left
+
+        Delivery is at least once: a batch is acknowledged only after the
+        insert succeeds, and returned to the queue when storage is out. A
+        batch storage rejects is split until the rejected readings are found;
+        those go to the dead-letter table so they never hold up the rest.
+        """
+        self._added = 0
+        consumer = f"ingest-flush-{os.getpid()}"
+        while True:
+            batch = self.queue.claim(self.max_rows, consumer=consumer)
+            if not batch:
+                return
+            started_at = time.time()
+            start = time.perf_counter()
+            try:
+                rows = self._store(batch, consumer)
+            except Exception as e:
+                # Whatever was stored or buried before the outage is no longer leased
+                self.queue.release([queue_id for queue_id, _ in batch], consumer)
+                self._trace([reading for _, reading in batch], started_at, time.perf_counter() - start,
+                            len(batch), f"{type(e).__name__}: {e}")
+                raise
+            duration = time.perf_counter() - start
+            FLUSH_LATENCY.observe(duration)
+            FLUSH_ROWS.observe(len(rows))
+            self._trace(rows, started_at, duration, len(batch))
+            rows = [_untraced(row) for row in rows]
+            if self.on_flush and rows:
+                self.on_flush(rows)
+            if len(batch) < self.max_rows:
+                return
+
+    def _store(self, batch, consumer):
+        """Write [(id, reading)] and acknowledge it; returns the readings stored"""
+        rows = [reading for _, reading in batch]
+        try:
+            self.write_batch([_untraced(row) for row in rows])
+        except Exception as e:
+            if is_outage(e):
+                raise
+            if len(batch) == 1:
+                logger.error(f"Storage rejected reading {batch[0][0]}, moved to dead letters: {e}")
+                self.queue.bury([batch[0][0]], consumer, str(e))
+                READINGS_REJECTED.inc()
+                self._trace(rows, time.time(), 0.0, 1, f"{type(e).__name__}: {e}")
+                return []
+            middle = len(batch) // 2
+            return self._store(batch[:middle], consumer) + self._store(batch[middle:], consumer)
+        self.queue.ack([queue_id for queue_id, _ in batch], consumer)
+        return rows
+
+    def _trace(self, readings, start, duration, batch_rows, error=None):
+        """Record the batch write as a child of each queuing request's span"""
+        if self.tracer is None:
+            return
+        for reading in readings:
+            context = reading.get(TRACE_KEY)
+            if context:
+                self.tracer.record('storage.insert_sensors', context[0], context[1], start, duration,
+                                   error, batch_rows=batch_rows)
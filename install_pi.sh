@@ -34,6 +34,10 @@ pip install --upgrade pip
 echo "Installing Python dependencies..."
 pip install -r requirements.txt
 
+# Build fingerprinted, precompressed static assets
+echo "Building static assets..."
+python3 build_static.py
+
 # Set up database
 echo "Setting up database..."
 python3 -c "from app import app, db; app.app_context().push(); db.create_all()"
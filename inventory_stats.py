@@ -0,0 +1,197 @@
+"""
+Inventory aggregate counters for Freezer Inventory System
+Counts per category and status plus an expiry histogram by day, updated on
+every item write so reads never scan the inventory
+"""
+
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def _entry(item):
+    expiry = item.get('expiry_date')
+    return (item.get('category') or 'other', int(bool(item.get('is_spoiled'))), expiry[:10] if expiry else None)
+
+
+class InventoryStats:
+    """Incrementally maintained inventory counters with periodic reconciliation
+
+    Each item's category, status and expiry day is kept in a small SQLite
+    table that the counts are aggregated from. With a state_path every worker
+    writes to and reads from the same file, so a write made in one worker is
+    counted by all of them at once; without it the table is in memory and
+    counts only this process's writes between reconciles.
+    """
+
+    def __init__(self, state_path=None, reconcile_timeout=120.0):
+        self.state_path = state_path
+        # A reconcile started longer ago than this is assumed to have died
+        self.reconcile_timeout = reconcile_timeout
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._memory = None
+        if state_path:
+            directory = os.path.dirname(state_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        else:
+            self._memory = sqlite3.connect(':memory:', isolation_level=None, check_same_thread=False)
+        self._connect().executescript('''
+            CREATE TABLE IF NOT EXISTS item_entry (
+                id INTEGER PRIMARY KEY,
+                category TEXT NOT NULL,
+                spoiled INTEGER NOT NULL,
+                expiry_day TEXT
+            );
+            -- Writes made while a reconcile is loading items, replayed on top
+            -- of the rebuilt table; removed rows mark deletions
+            CREATE TABLE IF NOT EXISTS reconcile_window (
+                id INTEGER PRIMARY KEY,
+                category TEXT,
+                spoiled INTEGER,
+                expiry_day TEXT,
+                removed INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS stats_state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        ''')
+
+    def _connect(self):
+        """Connection owned by the current thread and process"""
+        if self._memory is not None:
+            return self._memory
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.state_path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            # The next reconcile repairs anything lost on power loss
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextlib.contextmanager
+    def _transaction(self, write=True):
+        with self._lock:
+            db = self._connect()
+            db.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+
+    @staticmethod
+    def _state(db, key):
+        row = db.execute('SELECT value FROM stats_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_state(db, key, value):
+        if value is None:
+            db.execute('DELETE FROM stats_state WHERE key = ?', (key,))
+        else:
+            db.execute('INSERT OR REPLACE INTO stats_state (key, value) VALUES (?, ?)', (key, str(value)))
+
+    def item_upserted(self, item):
+        """Count an inserted item or re-count an updated one"""
+        row = (item['id'],) + _entry(item)
+        with self._transaction() as db:
+            db.execute('INSERT OR REPLACE INTO item_entry (id, category, spoiled, expiry_day) VALUES (?, ?, ?, ?)', row)
+            if self._state(db, 'reconciling_since'):
+                db.execute('INSERT OR REPLACE INTO reconcile_window (id, category, spoiled, expiry_day, removed) '
+                           'VALUES (?, ?, ?, ?, 0)', row)
+
+    def item_removed(self, item_id):
+        with self._transaction() as db:
+            db.execute('DELETE FROM item_entry WHERE id = ?', (item_id,))
+            if self._state(db, 'reconciling_since'):
+                db.execute('INSERT OR REPLACE INTO reconcile_window (id, removed) VALUES (?, 1)', (item_id,))
+
+    @property
+    def last_reconciled(self):
+        with self._lock:
+            value = self._state(self._connect(), 'last_reconciled')
+        return datetime.fromisoformat(value) if value else None
+
+    def reconcile(self, load_items):
+        """Rebuild every counter from load_items() and return the drift found
+
+        Writes counted while the items are loading may be missing from the
+        list, so they are applied again on top of the rebuilt counters. Only
+        one worker reconciles at a time; the others return None.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            started = self._state(db, 'reconciling_since')
+            if started and now - float(started) < self.reconcile_timeout:
+                return None
+            self._set_state(db, 'reconciling_since', now)
+            db.execute('DELETE FROM reconcile_window')
+        try:
+            items = load_items()
+        except BaseException:
+            with self._transaction() as db:
+                self._set_state(db, 'reconciling_since', None)
+            raise
+        return self._rebuild(items)
+
+    def _rebuild(self, items):
+        with self._transaction() as db:
+            before = self._counts(db)
+            db.execute('DELETE FROM item_entry')
+            db.executemany('INSERT OR REPLACE INTO item_entry (id, category, spoiled, expiry_day) VALUES (?, ?, ?, ?)',
+                           [(item['id'],) + _entry(item) for item in items])
+            db.execute('DELETE FROM item_entry WHERE id IN (SELECT id FROM reconcile_window WHERE removed)')
+            db.execute('INSERT OR REPLACE INTO item_entry (id, category, spoiled, expiry_day) '
+                       'SELECT id, category, spoiled, expiry_day FROM reconcile_window WHERE NOT removed')
+            db.execute('DELETE FROM reconcile_window')
+            after = self._counts(db)
+
+            drift = 0
+            for old, new in zip(before, after):
+                for key in set(old) | set(new):
+                    drift += abs(old.get(key, 0) - new.get(key, 0))
+            self._set_state(db, 'reconciling_since', None)
+            self._set_state(db, 'last_reconciled', datetime.utcnow().isoformat())
+            self._set_state(db, 'last_drift', drift)
+            return drift
+
+    @staticmethod
+    def _counts(db):
+        """(by category, by status, unspoiled items by expiry day)"""
+        by_category = dict(db.execute('SELECT category, COUNT(*) FROM item_entry GROUP BY category'))
+        by_status = {('spoiled' if spoiled else 'fresh'): count for spoiled, count in
+                     db.execute('SELECT spoiled, COUNT(*) FROM item_entry GROUP BY spoiled')}
+        expiry_by_day = dict(db.execute('SELECT expiry_day, COUNT(*) FROM item_entry '
+                                        'WHERE expiry_day IS NOT NULL AND NOT spoiled GROUP BY expiry_day'))
+        return by_category, by_status, expiry_by_day
+
+    def snapshot(self, expiry_warning_days=3):
+        """Current counters; expiry figures only consider unspoiled items"""
+        today = datetime.utcnow().date()
+        soon = (today + timedelta(days=expiry_warning_days)).isoformat()
+        today = today.isoformat()
+
+        with self._transaction(write=False) as db:
+            by_category, by_status, expiry_by_day = self._counts(db)
+            last_reconciled = self._state(db, 'last_reconciled')
+            last_drift = self._state(db, 'last_drift')
+
+        return {
+            'total': sum(by_status.values()),
+            'by_category': by_category,
+            'by_status': by_status,
+            'expired': sum(count for day, count in expiry_by_day.items() if day < today),
+            'expiring_soon': sum(count for day, count in expiry_by_day.items() if today <= day <= soon),
+            'expiry_by_day': dict(sorted(expiry_by_day.items())),
+            'last_reconciled': last_reconciled,
+            'last_drift': int(last_drift) if last_drift else 0
+        }
@@ -0,0 +1,183 @@
+"""
+Durable local queue for Freezer Inventory System
+A SQLite (WAL) table of JSON payloads that survives restarts and can be
+shared by several worker processes: consumers claim a batch under a lease,
+then acknowledge it once it has been handled, release it to retry later,
+or move it to a dead-letter table when it can never be handled
+"""
+
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class DurableQueue:
+    """FIFO of JSON payloads persisted in a SQLite file"""
+
+    def __init__(self, path, lease_seconds=30.0):
+        self.path = path
+        # Claimed rows not acknowledged within the lease are handed out again,
+        # so a worker that dies mid-flush does not lose them
+        self.lease_seconds = lease_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        db = self._connect()
+        db.execute('''
+            CREATE TABLE IF NOT EXISTS queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                enqueued_at REAL NOT NULL,
+                claimed_by TEXT,
+                claimed_until REAL,
+                dedupe_key TEXT
+            )
+        ''')
+        # Queues created before dedupe keys existed
+        if 'dedupe_key' not in [row[1] for row in db.execute('PRAGMA table_info(queue)')]:
+            db.execute('ALTER TABLE queue ADD COLUMN dedupe_key TEXT')
+        db.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_queue_dedupe_key ON queue(dedupe_key)')
+        db.execute('''
+            CREATE TABLE IF NOT EXISTS dead_letter (
+                id INTEGER PRIMARY KEY,
+                payload TEXT NOT NULL,
+                enqueued_at REAL NOT NULL,
+                failed_at REAL NOT NULL,
+                error TEXT
+            )
+        ''')
+
+    def _connect(self):
+        """Connection owned by the current thread and process"""
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            # Acknowledged means on disk, even if the Pi loses power right after
+            db.execute('PRAGMA synchronous=FULL')
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def put(self, payload, dedupe_key=None):
+        """Append one payload; it is on disk when this returns
+
+        A payload whose `dedupe_key` is already queued is not added again;
+        the ID of the queued one is returned instead.
+        """
+        with self._transaction() as db:
+            cursor = db.execute('INSERT OR IGNORE INTO queue (payload, enqueued_at, dedupe_key) VALUES (?, ?, ?)',
+                                (json.dumps(payload, default=str), time.time(), dedupe_key))
+            if cursor.rowcount:
+                return cursor.lastrowid
+            return db.execute('SELECT id FROM queue WHERE dedupe_key = ?', (dedupe_key,)).fetchone()[0]
+
+    def put_many(self, payloads):
+        now = time.time()
+        ids = []
+        with self._transaction() as db:
+            for payload in payloads:
+                cursor = db.execute('INSERT INTO queue (payload, enqueued_at) VALUES (?, ?)',
+                                    (json.dumps(payload, default=str), now))
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def claim(self, limit, consumer=None, exclusive=False):
+        """Lease up to `limit` of the oldest unclaimed payloads as [(id, payload)]
+
+        With `exclusive`, nothing is handed out while another lease is live,
+        so payloads are handled strictly in order by one consumer at a time.
+        """
+        consumer = consumer or _default_consumer()
+        now = time.time()
+        with self._transaction() as db:
+            if exclusive and db.execute('SELECT 1 FROM queue WHERE claimed_until >= ? LIMIT 1', (now,)).fetchone():
+                return []
+            rows = db.execute(
+                'SELECT id, payload FROM queue WHERE claimed_until IS NULL OR claimed_until < ? ORDER BY id LIMIT ?',
+                (now, limit)
+            ).fetchall()
+            db.executemany('UPDATE queue SET claimed_by = ?, claimed_until = ? WHERE id = ?',
+                           [(consumer, now + self.lease_seconds, row[0]) for row in rows])
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def ack(self, ids, consumer=None):
+        """Remove handled payloads still leased to `consumer`; returns how many were"""
+        return self._leased(ids, consumer, 'DELETE FROM queue WHERE id = ? AND claimed_by = ?')
+
+    def release(self, ids, consumer=None):
+        """Return payloads leased to `consumer` to the queue so they are retried"""
+        return self._leased(ids, consumer, 'UPDATE queue SET claimed_by = NULL, claimed_until = NULL '
+                                           'WHERE id = ? AND claimed_by = ?')
+
+    def renew(self, ids, consumer=None):
+        """Extend the lease on payloads still held by `consumer`; returns how many were"""
+        until = time.time() + self.lease_seconds
+        return self._leased(ids, consumer, 'UPDATE queue SET claimed_until = ? WHERE id = ? AND claimed_by = ?',
+                            (until,))
+
+    def bury(self, ids, consumer=None, error=None):
+        """Move payloads leased to `consumer` to the dead-letter table; returns how many were"""
+        if not ids:
+            return 0
+        consumer = consumer or _default_consumer()
+        with self._transaction() as db:
+            moved = db.executemany(
+                'INSERT INTO dead_letter (id, payload, enqueued_at, failed_at, error) '
+                'SELECT id, payload, enqueued_at, ?, ? FROM queue WHERE id = ? AND claimed_by = ?',
+                [(time.time(), error, row_id, consumer) for row_id in ids]
+            ).rowcount
+            db.executemany('DELETE FROM queue WHERE id = ? AND claimed_by = ?', [(row_id, consumer) for row_id in ids])
+        return moved
+
+    def dead_letters(self, limit=None):
+        """Payloads that could not be handled as [(id, payload, failed_at, error)], newest first"""
+        rows = self._connect().execute('SELECT id, payload, failed_at, error FROM dead_letter ORDER BY id DESC LIMIT ?',
+                                       (-1 if limit is None else limit,)).fetchall()
+        return [(row_id, json.loads(payload), failed_at, error) for row_id, payload, failed_at, error in rows]
+
+    def dead_letter_count(self):
+        return self._connect().execute('SELECT COUNT(*) FROM dead_letter').fetchone()[0]
+
+    def _leased(self, ids, consumer, statement, params=()):
+        # Rows whose lease ran out may have been claimed by another consumer since
+        if not ids:
+            return 0
+        consumer = consumer or _default_consumer()
+        with self._transaction() as db:
+            # executemany sums the rows changed by each statement
+            return db.executemany(statement, [params + (row_id, consumer) for row_id in ids]).rowcount
+
+    def peek(self, limit=None):
+        """Oldest payloads as [(id, payload, enqueued_at)], claimed or not, without leasing them"""
+        rows = self._connect().execute('SELECT id, payload, enqueued_at FROM queue ORDER BY id LIMIT ?',
+                                       (-1 if limit is None else limit,)).fetchall()
+        return [(row_id, json.loads(payload), enqueued_at) for row_id, payload, enqueued_at in rows]
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM queue').fetchone()[0]
+
+    def oldest_age(self):
+        """Seconds the oldest payload has been waiting, or 0 when empty"""
+        oldest = self._connect().execute('SELECT MIN(enqueued_at) FROM queue').fetchone()[0]
+        return max(0.0, time.time() - oldest) if oldest is not None else 0.0
+
+
+def _default_consumer():
+    """Consumer name of the calling thread, the same for its claim and its ack"""
+    return f"{os.getpid()}-{threading.get_ident()}"
@@ -0,0 +1,154 @@
+"""
+Logging setup for Freezer Inventory System
+Shared by the Flask app and the sensor daemons: callers only enqueue records,
+a listener thread formats them as JSON and writes them to stderr and an
+optional size-rotated file, and repeated errors from one call site are
+rate-limited
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+import tracing
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_lock = threading.Lock()
+_state = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with extras and the current trace ID"""
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'service': self.service,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Pass the first WARNING+ record per call site each interval, drop repeats
+
+    The next record let through reports how many were dropped.
+    """
+
+    def __init__(self, interval):
+        super().__init__()
+        self.interval = interval
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING or self.interval <= 0:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._seen.get(key, (None, 0))
+            if last is not None and now - last < self.interval:
+                self._seen[key] = (last, suppressed + 1)
+                return False
+            self._seen[key] = (now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class TracingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records without formatting them on the caller's thread"""
+
+    def prepare(self, record):
+        # Merge args now, since they may change before the listener runs
+        record.msg = record.getMessage()
+        record.args = None
+        span = tracing.current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+        return record
+
+
+def _start_listener(handlers):
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return log_queue, listener
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork; give the child its own.
+    # No locking here: another parent thread may have held _lock at fork time
+    if not _state:
+        return
+    log_queue, listener = _start_listener(_state['handlers'])
+    _state['queue_handler'].queue = log_queue
+    _state['listener'] = listener
+
+
+def _stop():
+    listener = _state.get('listener')
+    if listener is not None:
+        listener.stop()
+
+
+def setup_logging(service, level='INFO', log_file=None, max_bytes=1048576, backup_count=5,
+                  json_format=True, rate_limit_seconds=60):
+    """Route the root logger through a queue to stderr and an optional rotating file
+
+    Safe to call more than once; only the first call in a process configures logging.
+    """
+    with _lock:
+        if _state:
+            return _state['listener']
+
+        formatter = JsonFormatter(service) if json_format else logging.Formatter(
+            '%(asctime)s - %(levelname)s - %(message)s')
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue, listener = _start_listener(handlers)
+        queue_handler = TracingQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(rate_limit_seconds))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _state.update(handlers=handlers, queue_handler=queue_handler, listener=listener)
+
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_restart_after_fork)
+    atexit.register(_stop)
+    return listener
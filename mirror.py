@@ -0,0 +1,453 @@
+"""
+Local read mirror for Freezer Inventory System
+A SQLite (WAL) copy of the inventory and of recent sensor readings on the
+Pi itself: GET routes read it instead of the cloud database, writes go to
+the cloud first and are then applied locally, and a background sync pulls
+everything else in through the updated_at / created_at change cursors
+"""
+
+import contextlib
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from metrics import Gauge, Histogram
+from storage import ITEM_COLUMNS, SENSOR_COLUMNS
+
+MIRROR_QUERY_LATENCY = Histogram('mirror_query_seconds', 'Local mirror query time', ['operation'],
+                                 buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05))
+MIRROR_LAG = Gauge('mirror_sync_age_seconds', 'Seconds since the local mirror last synced with the cloud')
+
+_ITEM_FIELDS = ITEM_COLUMNS.split(',')
+_SENSOR_FIELDS = SENSOR_COLUMNS.split(',')
+_EPOCH = '1970-01-01T00:00:00+00:00'
+
+
+def epoch_seconds(value):
+    """Unix time of an ISO timestamp; naive values are taken as UTC"""
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _process_alive(pid):
+    """True while a process with this PID runs on this host"""
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        pass
+    return True
+
+
+def _timed(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            MIRROR_QUERY_LATENCY.labels(method.__name__).observe(time.perf_counter() - start)
+    return wrapper
+
+
+class LocalMirror:
+    """SQLite copy of inventory_item and recent sensor_data rows, stored as JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connect().executescript('''
+            CREATE TABLE IF NOT EXISTS inventory_item (
+                id INTEGER PRIMARY KEY,
+                added_ts REAL,
+                updated_ts REAL,
+                is_spoiled INTEGER NOT NULL,
+                row TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_item_added ON inventory_item(added_ts DESC, id DESC);
+            -- Items deleted here whose deletion the cloud has not confirmed yet
+            CREATE TABLE IF NOT EXISTS deleted_item (id INTEGER PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS sensor_data (
+                id INTEGER PRIMARY KEY,
+                device_id TEXT,
+                ts REAL NOT NULL,
+                is_anomaly INTEGER NOT NULL,
+                row TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sensor_ts ON sensor_data(ts);
+            CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+        ''')
+
+    def _connect(self):
+        """Connection owned by the current thread and process"""
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            # Losing the last sync on power loss only means fetching it again
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _stream(self, query, params, fields, page_size):
+        # Its own connection: the open cursor would otherwise block this
+        # thread's writes until the response is fully sent
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            cursor = db.execute(query, params)
+        except BaseException:
+            db.close()
+            raise
+        return _pages(db, cursor, fields, page_size)
+
+    # Sync bookkeeping
+    def get_state(self, key, default=None):
+        row = self._connect().execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key, value):
+        with self._transaction() as db:
+            db.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', (key, value))
+
+    def claim_sync(self, owner, lease_seconds):
+        """Take or renew the sync lease, owned by a PID; False while another live process holds it"""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute("SELECT value FROM sync_state WHERE key = 'sync_lease'").fetchone()
+            if row:
+                holder, until = row[0].rsplit(' ', 1)
+                if holder != owner and float(until) > now and _process_alive(holder):
+                    return False
+            db.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('sync_lease', ?)",
+                       (f"{owner} {now + lease_seconds}",))
+        return True
+
+    def counts(self):
+        db = self._connect()
+        return {
+            'items': db.execute('SELECT COUNT(*) FROM inventory_item').fetchone()[0],
+            'readings': db.execute('SELECT COUNT(*) FROM sensor_data').fetchone()[0]
+        }
+
+    # Inventory items
+    def upsert_items(self, rows):
+        """Store items, keeping whichever copy was updated last and skipping deleted ones"""
+        with self._transaction() as db:
+            db.executemany('''
+                INSERT INTO inventory_item (id, added_ts, updated_ts, is_spoiled, row)
+                SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM deleted_item WHERE id = ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    added_ts = excluded.added_ts, updated_ts = excluded.updated_ts,
+                    is_spoiled = excluded.is_spoiled, row = excluded.row
+                WHERE excluded.updated_ts IS NULL OR inventory_item.updated_ts IS NULL
+                    OR excluded.updated_ts >= inventory_item.updated_ts
+            ''', [(row['id'], epoch_seconds(row.get('added_date')), epoch_seconds(row.get('updated_at')),
+                   1 if row.get('is_spoiled') else 0, json.dumps(row, default=str), row['id']) for row in rows])
+
+    def delete_items(self, ids):
+        with self._transaction() as db:
+            db.executemany('DELETE FROM inventory_item WHERE id = ?', [(item_id,) for item_id in ids])
+            db.executemany('INSERT OR IGNORE INTO deleted_item (id) VALUES (?)', [(item_id,) for item_id in ids])
+
+    def keep_items(self, ids):
+        """Drop local items missing from the cloud's full list of IDs"""
+        with self._transaction() as db:
+            db.execute('CREATE TEMP TABLE IF NOT EXISTS cloud_id (id INTEGER PRIMARY KEY)')
+            db.execute('DELETE FROM cloud_id')
+            db.executemany('INSERT OR IGNORE INTO cloud_id (id) VALUES (?)', [(item_id,) for item_id in ids])
+            db.execute('DELETE FROM inventory_item WHERE id NOT IN (SELECT id FROM cloud_id)')
+            # Deletions the cloud now confirms no longer need guarding
+            db.execute('DELETE FROM deleted_item WHERE id NOT IN (SELECT id FROM cloud_id)')
+
+    @_timed
+    def list_items(self):
+        rows = self._connect().execute('SELECT row FROM inventory_item ORDER BY added_ts DESC, id DESC').fetchall()
+        return [json.loads(row) for row, in rows]
+
+    def iter_items(self, page_size):
+        """Yield API-shaped items one page at a time, newest first, read with fetchmany"""
+        return self._stream('SELECT row FROM inventory_item ORDER BY added_ts DESC, id DESC', (), _ITEM_FIELDS, page_size)
+
+    @_timed
+    def list_unspoiled_items(self):
+        rows = self._connect().execute('SELECT row FROM inventory_item WHERE is_spoiled = 0').fetchall()
+        return [json.loads(row) for row, in rows]
+
+    # Sensor readings
+    def upsert_sensors(self, rows):
+        with self._transaction() as db:
+            db.executemany('INSERT OR REPLACE INTO sensor_data (id, device_id, ts, is_anomaly, row) VALUES (?, ?, ?, ?, ?)',
+                           [(row['id'], row.get('device_id'), epoch_seconds(row['timestamp']),
+                             1 if row.get('is_anomaly') else 0, json.dumps(row, default=str)) for row in rows])
+
+    def prune_sensors(self, before):
+        with self._transaction() as db:
+            db.execute('DELETE FROM sensor_data WHERE ts < ?', (before,))
+
+    @_timed
+    def latest_sensor(self, since):
+        row = self._connect().execute('SELECT row FROM sensor_data WHERE ts >= ? ORDER BY ts DESC, id DESC LIMIT 1',
+                                      (epoch_seconds(since),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @_timed
+    def sensor_history(self, since):
+        rows = self._connect().execute('SELECT row FROM sensor_data WHERE ts >= ? ORDER BY ts, id',
+                                       (epoch_seconds(since),)).fetchall()
+        return [json.loads(row) for row, in rows]
+
+    def iter_sensor_history(self, since, page_size):
+        """Yield API-shaped readings since a timestamp one page at a time"""
+        return self._stream('SELECT row FROM sensor_data WHERE ts >= ? ORDER BY ts, id', (epoch_seconds(since),),
+                            _SENSOR_FIELDS, page_size)
+
+    @_timed
+    def sensor_anomalies(self, since, limit, device_id=None):
+        query = 'SELECT row FROM sensor_data WHERE is_anomaly = 1 AND ts >= ?'
+        params = [epoch_seconds(since)]
+        if device_id:
+            query += ' AND device_id = ?'
+            params.append(device_id)
+        rows = self._connect().execute(query + ' ORDER BY ts DESC LIMIT ?', params + [limit]).fetchall()
+        return [json.loads(row) for row, in rows]
+
+
+def _pages(db, cursor, fields, page_size):
+    """API-shaped pages of the JSON rows of a cursor, without loading them all"""
+    try:
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if rows:
+                yield [{field: value.get(field) for field in fields} for value in map(json.loads, (row for row, in rows))]
+            if len(rows) < page_size:
+                return
+    finally:
+        db.close()
+
+
+class MirroredStorage:
+    """Serve reads from a LocalMirror once it has synced; write through to the cloud
+
+    Until the first sync completes, and for sensor history older than the
+    mirror keeps, reads go to the cloud. Reads served while the last sync is
+    older than `max_lag` are reported through `on_stale(synced_at)`.
+    """
+
+    def __init__(self, cloud, mirror, retention_hours=48, max_lag=120.0, on_stale=None, on_write=None):
+        self.cloud = cloud
+        self.mirror = mirror
+        self.retention_hours = retention_hours
+        self.max_lag = max_lag
+        self.on_stale = on_stale
+        self.on_write = on_write
+        MIRROR_LAG.set_function(self._lag_or_nan)
+
+    def __getattr__(self, name):
+        # Everything not mirrored, e.g. door events, goes straight to the cloud
+        return getattr(self.cloud, name)
+
+    def synced_at(self):
+        value = self.mirror.get_state('synced_at')
+        return datetime.fromisoformat(value) if value else None
+
+    def lag(self):
+        synced_at = self.synced_at()
+        return (datetime.utcnow() - synced_at).total_seconds() if synced_at else None
+
+    def _lag_or_nan(self):
+        lag = self.lag()
+        return float('nan') if lag is None else lag
+
+    def _local(self):
+        """True when reads can be served from the mirror"""
+        synced_at = self.synced_at()
+        if synced_at is None:
+            return False
+        if self.on_stale and (datetime.utcnow() - synced_at).total_seconds() > self.max_lag:
+            self.on_stale(synced_at)
+        return True
+
+    def _covers(self, since):
+        horizon = datetime.utcnow() - timedelta(hours=self.retention_hours)
+        return epoch_seconds(since) >= horizon.replace(tzinfo=timezone.utc).timestamp()
+
+    # Reads
+    def list_items(self):
+        return self.mirror.list_items() if self._local() else self.cloud.list_items()
+
+    def iter_items(self, page_size):
+        if not self._local():
+            return self.cloud.iter_items(page_size)
+        return self.mirror.iter_items(page_size)
+
+    def list_unspoiled_items(self):
+        return self.mirror.list_unspoiled_items() if self._local() else self.cloud.list_unspoiled_items()
+
+    def latest_sensor(self, since):
+        # A newer reading older than the mirror's window would not be mirrored either
+        if self._covers(since) and self._local():
+            return self.mirror.latest_sensor(since)
+        return self.cloud.latest_sensor(since)
+
+    def sensor_history(self, since):
+        if self._covers(since) and self._local():
+            return self.mirror.sensor_history(since)
+        return self.cloud.sensor_history(since)
+
+    def iter_sensor_history(self, since, page_size):
+        if self._covers(since) and self._local():
+            return self.mirror.iter_sensor_history(since, page_size)
+        return self.cloud.iter_sensor_history(since, page_size)
+
+    def sensor_anomalies(self, since, limit, device_id=None):
+        if self._covers(since) and self._local():
+            return self.mirror.sensor_anomalies(since, limit, device_id)
+        return self.cloud.sensor_anomalies(since, limit, device_id)
+
+    # Writes: cloud first, then the mirror, so a failed write changes nothing locally
+    def insert_item(self, item_data):
+        row = self.cloud.insert_item(item_data)
+        if row:
+            self.mirror.upsert_items([row])
+        return row
+
+    def insert_items(self, rows):
+        rows = self.cloud.insert_items(rows)
+        if rows:
+            self.mirror.upsert_items(rows)
+        return rows
+
+    def update_item(self, item_id, update_data):
+        row = self.cloud.update_item(item_id, update_data)
+        if row:
+            self.mirror.upsert_items([row])
+        return row
+
+    def delete_item(self, item_id):
+        self.cloud.delete_item(item_id)
+        self.mirror.delete_items([item_id])
+
+    def mark_spoiled(self, item_ids):
+        rows = self.cloud.mark_spoiled(item_ids)
+        if rows:
+            self.mirror.upsert_items(rows)
+        return rows
+
+    def insert_sensor(self, sensor_data):
+        row = self.cloud.insert_sensor(sensor_data)
+        if row:
+            self.mirror.upsert_sensors([row])
+        return row
+
+    def insert_sensors(self, rows):
+        # Bulk inserts return no IDs; let the next sync fetch the new rows
+        self.cloud.insert_sensors(rows)
+        if self.on_write:
+            self.on_write()
+
+
+class MirrorSync:
+    """Pull cloud changes into a LocalMirror; run it from a PeriodicTask
+
+    Cursors are re-read with a small overlap, since rows can commit slightly
+    out of timestamp order; upserts make the repeats harmless. Deleted items
+    leave no trace in a change feed, so the full ID list is compared every
+    `prune_interval` seconds. Every worker process runs a MirrorSync on the
+    same mirror; only the one holding the lease, renewed on each run and
+    taken over `lease_seconds` after its holder stops, actually syncs.
+
+    Run tick() from the task: it syncs every `interval` seconds, and sooner
+    when any worker called request_sync() after writing, since the request
+    is recorded in the mirror where the lease holder sees it.
+    """
+
+    def __init__(self, cloud, mirror, retention_hours=48, prune_interval=300.0, page_size=1000, overlap=60.0,
+                 lease_seconds=60.0, interval=10.0):
+        self.cloud = cloud
+        self.mirror = mirror
+        self.interval = interval
+        self._last_sync = None
+        self._request_seen = 0.0
+        self.retention_hours = retention_hours
+        self.prune_interval = prune_interval
+        self.page_size = page_size
+        self.overlap = timedelta(seconds=overlap)
+        self.lease_seconds = lease_seconds
+        self._last_prune = None
+
+    def _since(self, key, default):
+        cursor = self.mirror.get_state(key)
+        if cursor is None:
+            return default
+        return (datetime.fromisoformat(cursor.replace('Z', '+00:00')) - self.overlap).isoformat()
+
+    def request_sync(self):
+        """Ask whichever worker holds the lease to sync at its next tick"""
+        self.mirror.set_state('sync_requested', repr(time.time()))
+
+    def tick(self):
+        """Sync if the interval has passed or a sync was requested since the last one"""
+        requested = float(self.mirror.get_state('sync_requested', 0))
+        due = self._last_sync is None or time.monotonic() - self._last_sync >= self.interval
+        if not due and requested <= self._request_seen:
+            return
+        # Syncing starts after the request, so it sees the write behind it
+        self._request_seen = requested
+        self._last_sync = time.monotonic()
+        self.sync()
+
+    def _hold_lease(self):
+        return self.mirror.claim_sync(str(os.getpid()), self.lease_seconds)
+
+    def sync(self):
+        if not self._hold_lease():
+            return
+        now = datetime.utcnow()
+
+        newest = None
+        for page in self.cloud.iter_items_changed_since(self._since('items_cursor', _EPOCH), self.page_size):
+            self.mirror.upsert_items(page)
+            newest = page[-1]['updated_at'] or newest
+            # A long first sync keeps the lease page by page
+            self._hold_lease()
+        if newest:
+            self.mirror.set_state('items_cursor', newest)
+
+        horizon = now - timedelta(hours=self.retention_hours)
+        newest = None
+        for page in self.cloud.iter_sensors_created_since(self._since('sensors_cursor', horizon.isoformat()), self.page_size):
+            self.mirror.upsert_sensors(page)
+            newest = page[-1]['created_at'] or newest
+        if newest:
+            self.mirror.set_state('sensors_cursor', newest)
+        self.mirror.prune_sensors(horizon.replace(tzinfo=timezone.utc).timestamp())
+
+        if self._last_prune is None or time.monotonic() - self._last_prune >= self.prune_interval:
+            ids = [row['id'] for page in self.cloud.iter_item_ids(self.page_size) for row in page]
+            self.mirror.keep_items(ids)
+            self._last_prune = time.monotonic()
+
+        self.mirror.set_state('synced_at', now.isoformat())
@@ -0,0 +1,200 @@
+"""
+Inventory mutation log for Freezer Inventory System
+Adds, edits and deletes go straight to storage while it is reachable; during
+an outage they are written to a local durable log and acknowledged at once,
+then replayed against storage in order by a background thread, so input on
+the touch screen survives Supabase outages and app restarts
+"""
+
+import logging
+import os
+import uuid
+from datetime import datetime
+from background import PeriodicTask
+from metrics import Counter, Gauge
+from storage import is_outage
+
+logger = logging.getLogger(__name__)
+
+MUTATIONS_APPLIED = Counter('inventory_mutations_applied_total', 'Logged inventory writes applied to storage', ['op'])
+MUTATIONS_FAILED = Counter('inventory_mutations_failed_total', 'Logged inventory writes storage refused, set aside', ['op'])
+MUTATIONS_PENDING = Gauge('inventory_mutations_pending', 'Inventory writes logged locally and not yet applied')
+
+OPERATIONS = ('insert', 'update', 'delete')
+
+
+def new_client_key():
+    return uuid.uuid4().hex
+
+
+class MutationLog:
+    """Durable queue of inventory writes made during outages, replayed in order by a per-process thread
+
+    Inserts carry a client_key stored with the item, so an insert replayed
+    after a lost response, or submitted twice by the browser, is stored
+    once. Updates and deletes are idempotent as they are. Consecutive
+    inserts are written in one round trip. Entries storage refuses for a
+    reason other than an outage are moved to the queue's dead-letter table
+    and reported by status(), so they never hold up the writes behind them.
+    """
+
+    def __init__(self, queue, storage, batch_size=50, replay_interval=5.0, on_applied=None):
+        self.queue = queue
+        self.storage = storage
+        self.batch_size = batch_size
+        self.on_applied = on_applied
+        self.task = PeriodicTask('mutation-replay', replay_interval, self.replay)
+        MUTATIONS_PENDING.set_function(lambda: len(self.queue))
+
+    def submit(self, op, item_id=None, data=None, client_key=None):
+        """Apply one write now, or log it when storage is out
+
+        While earlier writes are still waiting, new ones are logged behind
+        them so they never overtake them. Returns (entry, None) when logged,
+        or (None, row) when applied: the stored item, or None for a delete,
+        a missing item or an insert whose client_key is already stored.
+        """
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown mutation: {op}")
+        if not len(self.queue):
+            data = dict(data or {})
+            if op == 'insert':
+                client_key = client_key or new_client_key()
+                data['client_key'] = client_key
+            entry = {'op': op, 'item_id': item_id, 'client_key': client_key, 'data': data}
+            try:
+                rows = self._store([entry])
+            except Exception as e:
+                if not is_outage(e):
+                    raise
+                logger.warning(f"Storage unavailable, logging {op} for replay: {e}")
+            else:
+                if self.on_applied:
+                    self.on_applied([entry], rows)
+                return None, rows[0] if rows else None
+        return self.append(op, item_id, data, client_key), None
+
+    def append(self, op, item_id=None, data=None, client_key=None):
+        """Log one write and wake the replayer; returns the logged entry"""
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown mutation: {op}")
+        data = dict(data or {})
+        if op == 'insert':
+            client_key = client_key or new_client_key()
+            data['client_key'] = client_key
+            # The time the user added it, not the time the cloud first saw it
+            data.setdefault('added_date', datetime.utcnow().isoformat())
+        entry = {'op': op, 'item_id': item_id, 'client_key': client_key, 'data': data,
+                 'logged_at': datetime.utcnow().isoformat()}
+        # A retried submission still waiting to be applied keeps the first one
+        entry['id'] = self.queue.put(entry, dedupe_key=client_key if op == 'insert' else None)
+        self.task.wake()
+        return entry
+
+    def replay(self):
+        """Apply logged writes in order until none are left
+
+        An entry is acknowledged once storage has accepted it; an outage
+        returns it and everything after it to the log, so later writes never
+        overtake an earlier one. Each storage call ends within
+        the storage deadline, well inside the lease, and the lease on the
+        rest of the batch is renewed after every call; should it still run
+        out, the worker that claimed the entries since replays them and this
+        one stops.
+        """
+        consumer = f"mutation-replay-{os.getpid()}"
+        while True:
+            batch = self.queue.claim(self.batch_size, consumer=consumer, exclusive=True)
+            if not batch:
+                return
+            remaining = [queue_id for queue_id, _ in batch]
+            try:
+                for run in _runs(batch):
+                    handled = self._apply_run(run, consumer)
+                    remaining = remaining[len(run):]
+                    if handled < len(run) or self.queue.renew(remaining, consumer) < len(remaining):
+                        logger.warning("Mutation log lease expired during replay; leaving the rest to its new holder")
+                        return
+            except Exception:
+                self.queue.release(remaining, consumer)
+                raise
+            if len(batch) < self.batch_size:
+                return
+
+    def _apply_run(self, run, consumer):
+        """Apply [(id, entry)] and acknowledge it; returns how many entries were still leased
+
+        A run storage rejects is split until the rejected entries are found,
+        which are set aside in the dead-letter table.
+        """
+        try:
+            self._apply([entry for _, entry in run])
+        except Exception as e:
+            if is_outage(e):
+                raise
+            if len(run) == 1:
+                queue_id, entry = run[0]
+                logger.error(f"Storage refused logged {entry['op']} {queue_id}, setting it aside: {e}")
+                MUTATIONS_FAILED.labels(entry['op']).inc()
+                return self.queue.bury([queue_id], consumer, str(e))
+            middle = len(run) // 2
+            return self._apply_run(run[:middle], consumer) + self._apply_run(run[middle:], consumer)
+        return self.queue.ack([queue_id for queue_id, _ in run], consumer)
+
+    def _store(self, entries):
+        """Write a run of entries to storage; returns the rows stored"""
+        op = entries[0]['op']
+        if op == 'insert':
+            # Rows already stored by an earlier attempt are skipped by client_key
+            return self.storage.insert_items([entry['data'] for entry in entries]) or []
+        if op == 'update':
+            row = self.storage.update_item(entries[0]['item_id'], entries[0]['data'])
+            return [row] if row else []
+        self.storage.delete_item(entries[0]['item_id'])
+        return []
+
+    def _apply(self, entries):
+        op = entries[0]['op']
+        results = self._store(entries)
+        if op == 'update' and not results:
+            logger.warning(f"Dropping logged update of item {entries[0]['item_id']}: item no longer exists")
+        MUTATIONS_APPLIED.labels(op).inc(len(entries))
+        if self.on_applied:
+            self.on_applied(entries, results)
+
+    def status(self, limit=5):
+        """How many writes are waiting to reach storage or were refused, with the oldest `limit` of each, for the UI"""
+        pending = len(self.queue)
+        return {
+            'pending': pending,
+            'oldest_seconds': round(self.queue.oldest_age(), 1),
+            'last_error': self.task.last_error if pending else None,
+            'mutations': [dict(_summary(queue_id, entry), logged_at=entry['logged_at'])
+                          for queue_id, entry, _ in self.queue.peek(limit)],
+            'failed': self.queue.dead_letter_count(),
+            'failed_mutations': [dict(_summary(queue_id, entry), failed_at=datetime.utcfromtimestamp(failed_at).isoformat(),
+                                      error=error)
+                                 for queue_id, entry, failed_at, error in self.queue.dead_letters(limit)]
+        }
+
+
+def _summary(queue_id, entry):
+    """A logged write without its payload, which can carry a whole QR code"""
+    return {
+        'id': queue_id,
+        'op': entry['op'],
+        'item_id': entry['item_id'],
+        'client_key': entry['client_key'],
+        'name': entry['data'].get('name')
+    }
+
+
+def _runs(batch):
+    """Split [(id, entry)] into runs applied with one storage call: consecutive inserts, or a single write"""
+    runs = []
+    for queue_id, entry in batch:
+        if runs and entry['op'] == 'insert' and runs[-1][-1][1]['op'] == 'insert':
+            runs[-1].append((queue_id, entry))
+        else:
+            runs.append([(queue_id, entry)])
+    return runs
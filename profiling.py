@@ -0,0 +1,243 @@
+"""
+On-demand request profiling for Freezer Inventory System
+Samples the stacks of the thread serving a flagged request, and of helper
+threads it hands work to, while the request runs and stores them as folded
+stacks (flamegraph.pl / speedscope input) in a bounded directory, listed and
+downloaded through /api/profiles
+"""
+
+import contextvars
+import functools
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import Blueprint, abort, current_app, g, jsonify, request, send_from_directory, url_for
+
+profiling_bp = Blueprint('profiling', __name__)
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = '.folded'
+MIN_HZ = 10
+MAX_HZ = 1000
+
+# Sampler of the request being handled, for handed_off() to pick up
+_active = contextvars.ContextVar('profiler', default=None)
+
+
+class StackSampler:
+    """Background thread counting the stacks of the threads it follows
+
+    The thread that starts it is followed from the start; others are added
+    while they run work handed off by it, so concurrent requests in the same
+    worker stay out of the profile.
+    """
+
+    def __init__(self, hz):
+        self.interval = 1.0 / hz
+        self.samples = 0
+        self.stacks = Counter()
+        self._threads = {}  # thread ident -> number of hand-offs running on it
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.follow()
+        self._thread.start()
+
+    def follow(self):
+        """Sample the calling thread until the matching unfollow()"""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+
+    def unfollow(self):
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] -= 1
+            if not self._threads[ident]:
+                del self._threads[ident]
+
+    def stop(self):
+        """Stop sampling and return the elapsed wall time in seconds"""
+        self._stop.set()
+        self._thread.join()
+        return time.perf_counter() - self.started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                followed = set(self._threads)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in followed:
+                    self.stacks[self._fold(names.get(thread_id, str(thread_id)), frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _fold(thread_name, frame):
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        frames.append(thread_name.replace(';', ':'))
+        return ';'.join(reversed(frames))
+
+    def folded(self):
+        """Stacks in the folded format, one 'frame;frame;... count' per line"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def handed_off(fn):
+    """Wrap fn to run on another thread; a profile of the current request then samples that thread too"""
+    sampler = _active.get()
+    if sampler is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        sampler.follow()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.unfollow()
+    return run
+
+
+def profile_dir(app):
+    return app.config['PROFILE_DIR']
+
+
+def authorized(app):
+    """True when the request carries the configured profiling token
+
+    Only the header is accepted: a token in the URL ends up in access logs
+    and browser history.
+    """
+    token = app.config['PROFILE_TOKEN']
+    if not token:
+        return False
+    supplied = request.headers.get('X-Profile-Token', '')
+    return hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def requested_hz(app):
+    """Sampling rate asked for by the X-Profile header or ?profile=, or None"""
+    value = request.headers.get('X-Profile') or request.args.get('profile')
+    if not value:
+        return None
+    try:
+        hz = int(value)
+    except ValueError:
+        return None
+    if hz <= 0:
+        return None
+    if hz == 1:
+        hz = app.config['PROFILE_DEFAULT_HZ']
+    return min(max(hz, MIN_HZ), MAX_HZ)
+
+
+def start_profiling():
+    """Start a sampler for requests that ask for one with a valid token"""
+    app = current_app._get_current_object()
+    hz = requested_hz(app)
+    if hz is None or not authorized(app):
+        return
+    sampler = StackSampler(hz)
+    sampler.start()
+    g.profiler = sampler
+    _active.set(sampler)
+
+
+def finish_profiling(response):
+    """Write the profile once the response body has been sent"""
+    sampler = g.pop('profiler', None)
+    if sampler is None:
+        return response
+
+    app = current_app._get_current_object()
+    route = request.url_rule.rule if request.url_rule else request.path
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+    name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{request.method.lower()}-{slug}{PROFILE_SUFFIX}"
+    response.headers['X-Profile-Id'] = name
+
+    # Streamed bodies are generated after this hook, so stop on close
+    def save():
+        _active.set(None)
+        sampler.stop()
+        try:
+            write_profile(app, name, sampler)
+        except OSError as e:
+            logger.error(f"Error writing profile {name}: {e}")
+
+    response.call_on_close(save)
+    return response
+
+
+def abandon_profiling(exc):
+    """Stop a sampler whose request failed before a response was made"""
+    sampler = g.pop('profiler', None)
+    if sampler is not None:
+        _active.set(None)
+        sampler.stop()
+
+
+def write_profile(app, name, sampler):
+    directory = profile_dir(app)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), 'w') as f:
+        f.write(sampler.folded())
+    prune_profiles(directory, app.config['PROFILE_MAX_FILES'])
+
+
+def prune_profiles(directory, keep):
+    """Delete the oldest profiles beyond the newest `keep`"""
+    names = sorted(name for name in os.listdir(directory) if name.endswith(PROFILE_SUFFIX))
+    for name in names[:-keep] if keep > 0 else names:
+        os.remove(os.path.join(directory, name))
+
+
+@profiling_bp.route('/api/profiles')
+def list_profiles():
+    """Recent profiles, newest first"""
+    if not authorized(current_app):
+        abort(403)
+    directory = profile_dir(current_app)
+    if not os.path.isdir(directory):
+        return jsonify([])
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(PROFILE_SUFFIX):
+            continue
+        stat = os.stat(os.path.join(directory, name))
+        profiles.append({
+            'id': name,
+            'size': stat.st_size,
+            'created': datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+            'url': url_for('profiling.download_profile', name=name)
+        })
+    return jsonify(profiles)
+
+
+@profiling_bp.route('/api/profiles/<name>')
+def download_profile(name):
+    """Folded stacks of one profile, ready for flamegraph.pl or speedscope"""
+    if not authorized(current_app) or not name.endswith(PROFILE_SUFFIX):
+        abort(403)
+    return send_from_directory(profile_dir(current_app), name, mimetype='text/plain', as_attachment=True)
+
+
+def init_profiling(app):
+    """Register the profiling hooks and the profile index endpoints"""
+    app.before_request(start_profiling)
+    app.after_request(finish_profiling)
+    app.teardown_request(abandon_profiling)
+    app.register_blueprint(profiling_bp)
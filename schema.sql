@@ -1,6 +1,7 @@
 -- Supabase Schema for Fridge Inventory System
 -- Drop existing tables if they exist
 DROP TABLE IF EXISTS sensor_data CASCADE;
+DROP TABLE IF EXISTS door_event CASCADE;
 DROP TABLE IF EXISTS inventory_item CASCADE;
 
 -- Create inventory_item table
@@ -15,6 +16,7 @@ CREATE TABLE inventory_item (
     notes TEXT,
     is_spoiled BOOLEAN DEFAULT FALSE,
     qr_code TEXT,
+    client_key TEXT UNIQUE,  -- idempotency key of writes replayed from the Pi's mutation log
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
@@ -22,12 +24,28 @@ CREATE TABLE inventory_item (
 -- Create sensor_data table
 CREATE TABLE sensor_data (
     id BIGSERIAL PRIMARY KEY,
+    device_id VARCHAR(50) DEFAULT 'default',
     timestamp TIMESTAMPTZ DEFAULT NOW(),
     co2_ppm FLOAT,
     ammonia_ppm FLOAT,
     h2s_ppm FLOAT,
     door_open BOOLEAN,
     air_quality VARCHAR(20),
+    is_anomaly BOOLEAN DEFAULT FALSE,
+    anomalies JSONB,
+    ammonia_stats JSONB,  -- min/max/mean/median/stddev/count of the samples behind ammonia_ppm
+    h2s_stats JSONB,
+    temperature FLOAT,  -- °C from the DHT22
+    humidity FLOAT,  -- relative humidity, %
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Create door_event table (one row per debounced open/close edge)
+CREATE TABLE door_event (
+    id BIGSERIAL PRIMARY KEY,
+    device_id VARCHAR(50) DEFAULT 'default',
+    state VARCHAR(6) NOT NULL CHECK (state IN ('open', 'closed')),
+    occurred_at TIMESTAMPTZ NOT NULL,
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
@@ -49,6 +67,7 @@ CREATE TRIGGER update_inventory_item_updated_at
 -- Enable Row Level Security (RLS)
 ALTER TABLE inventory_item ENABLE ROW LEVEL SECURITY;
 ALTER TABLE sensor_data ENABLE ROW LEVEL SECURITY;
+ALTER TABLE door_event ENABLE ROW LEVEL SECURITY;
 
 -- Create policies for inventory_item
 -- Allow all operations for anonymous users (you can restrict this later)
@@ -64,11 +83,21 @@ CREATE POLICY "Allow all for sensor_data" ON sensor_data
     USING (true)
     WITH CHECK (true);
 
+-- Create policies for door_event
+CREATE POLICY "Allow all for door_event" ON door_event
+    FOR ALL
+    USING (true)
+    WITH CHECK (true);
+
 -- Create indexes for better performance
 CREATE INDEX idx_inventory_item_category ON inventory_item(category);
 CREATE INDEX idx_inventory_item_expiry_date ON inventory_item(expiry_date);
 CREATE INDEX idx_inventory_item_is_spoiled ON inventory_item(is_spoiled);
 CREATE INDEX idx_sensor_data_timestamp ON sensor_data(timestamp DESC);
+CREATE INDEX idx_sensor_data_anomaly ON sensor_data(timestamp DESC) WHERE is_anomaly;
+CREATE INDEX idx_inventory_item_updated_at ON inventory_item(updated_at);
+CREATE INDEX idx_sensor_data_created_at ON sensor_data(created_at);
+CREATE INDEX idx_door_event_device_time ON door_event(device_id, occurred_at);
 
 -- Insert sample data (optional)
 INSERT INTO inventory_item (name, quantity, unit, category, expiry_date, notes) VALUES
@@ -8,11 +8,11 @@ import serial
 import time
 import requests
 import json
+import os
 from datetime import datetime
 import logging
+from logging_setup import setup_logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class SensorDataSender:
@@ -112,7 +112,7 @@ class SensorDataSender:
                 timeout=5
             )
             
-            if response.status_code == 201:
+            if response.status_code in (201, 202):
                 logger.info(f"✓ Sensor data sent: CO2={co2_ppm} PPM, Quality={sensor_data['air_quality']}")
                 return True
             else:
@@ -134,7 +134,7 @@ class SensorDataSender:
         try:
             while True:
                 reading_count += 1
-                logger.info(f"\n--- Reading #{reading_count} ---")
+                logger.debug(f"--- Reading #{reading_count} ---")
                 
                 # Read CO2 sensor
                 co2_value = self.read_co2()
@@ -153,7 +153,7 @@ class SensorDataSender:
                     logger.warning("Failed to read CO2 sensor")
                 
                 # Wait for next reading
-                logger.info(f"Waiting {interval} seconds for next reading...")
+                logger.debug(f"Waiting {interval} seconds for next reading...")
                 time.sleep(interval)
                 
         except KeyboardInterrupt:
@@ -201,9 +201,15 @@ def main():
                        help='Sensor reading interval in seconds')
     parser.add_argument('--once', action='store_true',
                        help='Send single reading and exit')
+    parser.add_argument('--log-file', default=os.environ.get('LOG_FILE'),
+                       help='Also write logs to this size-rotated file')
+    parser.add_argument('--log-level', default=os.environ.get('LOG_LEVEL', 'INFO'),
+                       help='Minimum level logged (DEBUG includes every reading)')
     
     args = parser.parse_args()
     
+    setup_logging('sensors', level=args.log_level.upper(), log_file=args.log_file)
+    
     # Create sensor sender
     sender = SensorDataSender(flask_url=args.url)
     
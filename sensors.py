@@ -7,9 +7,21 @@ This script reads sensor data from MH-Z19E (CO2), MQ137 (Ammonia), and MQ136 (H2
 import requests
 import time
 import json
+import os
+import queue
+import socket
 import serial
+import threading
+from collections import deque
 from datetime import datetime
 import logging
+import tracing
+from logging_setup import setup_logging
+from metrics import Counter, Gauge, Histogram, serve_metrics
+from adc_sampling import AdcSampler, NUMPY_AVAILABLE
+from dht_sensor import DhtReader
+from supervisor import write_watchdog
+from config import Config
 
 # Try to import Raspberry Pi specific modules
 try:
@@ -29,13 +41,189 @@ except ImportError:
     print("Warning: ADC modules not available - MQ sensor readings will be disabled")
     ADC_AVAILABLE = False
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Sensor-side metrics, scraped from the --metrics-port listener
+SERIAL_READ_LATENCY = Histogram('co2_serial_read_seconds', 'MH-Z19E command/response round trip',
+                                buckets=(0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0, 2.0))
+BAD_FRAMES = Counter('co2_bad_frames_total', 'MH-Z19E responses rejected', ['reason'])
+UPLOAD_LATENCY = Histogram('sensor_upload_seconds', 'Time to post a reading to the Flask app')
+UPLOAD_FAILURES = Counter('sensor_upload_failures_total', 'Readings the Flask app did not accept')
+UPLOAD_QUEUE_DEPTH = Gauge('sensor_upload_queue_depth', 'Readings waiting to be re-sent')
+DOOR_EVENTS = Counter('door_events_total', 'Debounced door edges detected', ['state'])
+SAMPLE_INTERVAL = Gauge('sensor_sample_interval_seconds', 'Current wait between readings')
+SAMPLE_RATE = Gauge('sensor_samples_per_minute', 'Readings taken per minute over the last ten minutes')
+READINGS_SENT = Counter('sensor_readings_sent_total', 'Readings transmitted, by what triggered them', ['reason'])
+READINGS_SUPPRESSED = Counter('sensor_readings_suppressed_total', 'Readings inside the deadband and not transmitted')
+
+# Readings kept for retry while the Flask app is unreachable
+UPLOAD_QUEUE_SIZE = 120
+
+
+def co2_frame_error(response):
+    """Reason an MH-Z19E response frame is unusable, or None when it is valid"""
+    if len(response) != 9:
+        return 'length'
+    if response[0] != 0xFF or response[1] != 0x86:
+        return 'header'
+    checksum = (0xFF - (sum(response[1:8]) & 0xFF) + 1) & 0xFF
+    if response[8] != checksum:
+        return 'checksum'
+    return None
+
+class AdaptiveSampler:
+    """Choose the wait before the next reading from the last ones
+
+    Samples every `fast_interval` seconds while the door is open or a metric
+    moved by at least its change threshold since the previous reading, then
+    stretches the wait by `backoff` after each run of `stable_readings`
+    unchanged readings, up to `slow_interval`.
+    """
+
+    # Change between consecutive readings that counts as "moving"
+    CHANGE_THRESHOLDS = {
+        'co2_ppm': 50.0,
+        'ammonia_ppm': 2.0,
+        'h2s_ppm': 1.0,
+        'temperature': 1.0
+    }
+
+    def __init__(self, interval=30, fast_interval=2, slow_interval=300, stable_readings=5,
+                 backoff=2.0, change_thresholds=None):
+        self.base_interval = interval
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.stable_readings = stable_readings
+        self.backoff = backoff
+        self.change_thresholds = change_thresholds or self.CHANGE_THRESHOLDS
+        self.interval = interval
+        self.reason = 'start'
+        self._previous = None
+        self._stable = 0
+        self._taken = deque()
+        SAMPLE_INTERVAL.set_function(lambda: self.interval)
+        SAMPLE_RATE.set_function(self.samples_per_minute)
+
+    def next_interval(self, reading):
+        """Record a reading and return how long to wait before the next one"""
+        now = time.monotonic()
+        self._taken.append(now)
+        while self._taken and now - self._taken[0] > 600:
+            self._taken.popleft()
+
+        changed = self._changed_metric(reading)
+        self._previous = reading
+        if reading.get('door_open'):
+            self._set(self.fast_interval, 'door open')
+        elif changed:
+            self._set(self.fast_interval, f'{changed} changing')
+        else:
+            self._stable += 1
+            if self.interval < self.base_interval:
+                # Leaving fast mode: return to the normal rate straight away
+                self._set(self.base_interval, 'stable')
+            elif self._stable >= self.stable_readings and self.interval < self.slow_interval:
+                self._set(min(self.interval * self.backoff, self.slow_interval), 'stable')
+        return self.interval
+
+    def wake(self):
+        """Switch to the fast interval, e.g. when the door opens"""
+        self._set(self.fast_interval, 'door open')
+
+    def samples_per_minute(self):
+        if len(self._taken) < 2:
+            return 0.0
+        span = self._taken[-1] - self._taken[0]
+        return (len(self._taken) - 1) * 60.0 / span if span > 0 else 0.0
+
+    def _changed_metric(self, reading):
+        if self._previous is None:
+            return None
+        for metric, threshold in self.change_thresholds.items():
+            current, previous = reading.get(metric), self._previous.get(metric)
+            if current is not None and previous is not None and abs(current - previous) >= threshold:
+                return metric
+        return None
+
+    def _set(self, interval, reason):
+        self._stable = 0
+        if interval != self.interval:
+            logger.info(f"Sampling every {interval:g}s ({reason})")
+        self.interval = interval
+        self.reason = reason
+
+
+class DeadbandFilter:
+    """Report by exception: decide which readings are worth transmitting
+
+    A reading is sent when a metric moved by more than its deadband since
+    the last one sent, when the door or air quality state changed, or when
+    nothing has been sent for `heartbeat` seconds. Between sends the server
+    holds the last value, so history can be read as a step function. For
+    the sampled MQ metrics the max of the samples since the last send is
+    tested too, so a spike over before the reading is taken still counts.
+    """
+
+    DEADBANDS = {
+        'co2_ppm': 25.0,
+        'ammonia_ppm': 1.0,
+        'h2s_ppm': 0.5,
+        'temperature': 0.5,
+        'humidity': 2.0
+    }
+    STATES = ('door_open', 'air_quality')
+    STATS = {'ammonia_ppm': 'ammonia_stats', 'h2s_ppm': 'h2s_stats'}
+
+    def __init__(self, deadbands=None, heartbeat=300):
+        self.deadbands = deadbands or self.DEADBANDS
+        self.heartbeat = heartbeat
+        self._last_sent = None
+        self._last_sent_at = None
+
+    def check(self, reading):
+        """Why the reading should be sent, or None to suppress it"""
+        reason = self._reason(reading)
+        if reason:
+            self._last_sent = reading
+            self._last_sent_at = time.monotonic()
+            READINGS_SENT.labels(reason).inc()
+        else:
+            READINGS_SUPPRESSED.inc()
+        return reason
+
+    def _reason(self, reading):
+        if self._last_sent is None:
+            return 'first'
+        for key in self.STATES:
+            if reading.get(key) != self._last_sent.get(key):
+                return key
+        for metric, deadband in self.deadbands.items():
+            current, previous = reading.get(metric), self._last_sent.get(metric)
+            if (current is None) != (previous is None):
+                return metric
+            if current is not None and abs(current - previous) > deadband:
+                return metric
+            stats = reading.get(self.STATS.get(metric))
+            if stats and previous is not None and stats['max'] - previous > deadband:
+                return metric
+        if time.monotonic() - self._last_sent_at >= self.heartbeat:
+            return 'heartbeat'
+        return None
+
+
 class FreezerSensors:
-    def __init__(self, flask_url="http://localhost:5000"):
+    def __init__(self, flask_url="http://localhost:5000", device_id=None, tracer=None, door_bounce_ms=200,
+                 sampler=None, deadband=None, adc_rate_hz=50, dht_pin=None, watchdog_file=None):
         self.flask_url = flask_url
+        self.device_id = device_id or socket.gethostname()
+        self.tracer = tracer or tracing.Tracer('sensors')
+        self.sampler = sampler
+        self.deadband = deadband
+        self.watchdog_file = watchdog_file
+        # Set by a door edge to end the current wait early
+        self.wake_event = threading.Event()
+        self.upload_queue = deque(maxlen=UPLOAD_QUEUE_SIZE)
+        UPLOAD_QUEUE_DEPTH.set_function(lambda: len(self.upload_queue))
         
         # Sensor configuration
         self.co2_serial_port = '/dev/serial0'  # UART port for MH-Z19E
@@ -62,6 +250,10 @@ class FreezerSensors:
         
         # Door sensor configuration (magnetic switch)
         self.door_sensor_pin = 18  # GPIO pin for door sensor
+        self.door_bounce_ms = door_bounce_ms
+        self.door_open = None  # Kept current by the edge callback
+        self.door_edges_enabled = False
+        self.door_events = queue.Queue()
         
         # Setup GPIO
         self.setup_gpio()
@@ -69,6 +261,18 @@ class FreezerSensors:
         # CO2 sensor initialization
         self.setup_co2_sensor()
         
+        # Continuous MQ sampling between readings
+        self.adc_sampler = None
+        if adc_rate_hz:
+            self.setup_adc_sampling(adc_rate_hz)
+        
+        # Temperature/humidity, polled in the background
+        self.dht = None
+        if dht_pin is not None:
+            dht = DhtReader(dht_pin)
+            if dht.start():
+                self.dht = dht
+        
     def setup_gpio(self):
         """Initialize GPIO pins"""
         if not GPIO_AVAILABLE:
@@ -81,6 +285,56 @@ class FreezerSensors:
             logger.info("GPIO setup completed")
         except Exception as e:
             logger.error(f"Error setting up GPIO: {e}")
+            return
+        
+        # Edge interrupts catch every opening, however short, without polling
+        try:
+            self.door_open = bool(GPIO.input(self.door_sensor_pin))
+            GPIO.add_event_detect(self.door_sensor_pin, GPIO.BOTH,
+                                  callback=self.on_door_edge, bouncetime=self.door_bounce_ms)
+            self.door_edges_enabled = True
+            threading.Thread(target=self.send_door_events, name='door-events', daemon=True).start()
+            logger.info(f"Door edge detection enabled (debounce {self.door_bounce_ms} ms)")
+        except Exception as e:
+            logger.error(f"Error enabling door edge detection, falling back to polling: {e}")
+    
+    def on_door_edge(self, channel):
+        """GPIO callback: record a debounced open/close edge"""
+        occurred_at = datetime.utcnow().isoformat()
+        # Magnetic switch: LOW when door is closed, HIGH when door is open
+        door_open = bool(GPIO.input(channel))
+        if door_open == self.door_open:
+            return
+        self.door_open = door_open
+        state = 'open' if door_open else 'closed'
+        DOOR_EVENTS.labels(state).inc()
+        logger.debug(f"Door {state} at {occurred_at}")
+        self.door_events.put({'device_id': self.device_id, 'state': state, 'occurred_at': occurred_at})
+        if door_open and self.sampler:
+            self.sampler.wake()
+            self.wake_event.set()
+    
+    def send_door_events(self):
+        """Post door edges as they happen, batching any that queued meanwhile"""
+        pending = []
+        while True:
+            if not pending:
+                pending.append(self.door_events.get())
+            while True:
+                try:
+                    pending.append(self.door_events.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                response = requests.post(f"{self.flask_url}/api/door_events", json=pending, timeout=5)
+                if response.status_code == 201:
+                    pending = []
+                    continue
+                logger.error(f"Failed to send door events: {response.status_code}")
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error sending door events: {e}")
+            # Keep the events and retry; the edge callback never waits on this
+            time.sleep(5)
     
     def setup_co2_sensor(self):
         """Initialize CO2 sensor serial connection"""
@@ -109,25 +363,51 @@ class FreezerSensors:
             return None
             
         try:
-            # Send read command to MH-Z19E
-            self.co2_serial.write(b'\xff\x01\x86\x00\x00\x00\x00\x00\x79')
-            time.sleep(0.1)
+            with tracing.span('read_co2'), SERIAL_READ_LATENCY.time():
+                # Send read command to MH-Z19E
+                self.co2_serial.write(b'\xff\x01\x86\x00\x00\x00\x00\x00\x79')
+                time.sleep(0.1)
+                
+                # Read response
+                response = self.co2_serial.read(9)
             
-            # Read response
-            response = self.co2_serial.read(9)
-            if len(response) == 9:
+            error = co2_frame_error(response)
+            if error is None:
                 # Parse CO2 concentration (bytes 2 and 3)
                 co2_high = response[2]
                 co2_low = response[3]
                 co2_concentration = (co2_high * 256) + co2_low
                 return co2_concentration
             else:
-                logger.warning("Invalid response from CO2 sensor")
+                BAD_FRAMES.labels(error).inc()
+                logger.warning(f"Invalid response from CO2 sensor ({error})")
                 return None
         except Exception as e:
             logger.error(f"Error reading CO2 sensor: {e}")
             return None
     
+    def setup_adc_sampling(self, rate_hz):
+        """Sample the MQ channels at rate_hz in the background"""
+        if not (self.mq137_channel and self.mq136_channel):
+            return
+        if not NUMPY_AVAILABLE:
+            logger.warning("numpy not available - MQ sensors will be read once per interval")
+            return
+        try:
+            # The two channels share one ADC, so every read switches the MUX and
+            # needs a fresh conversion: single-shot at the fastest data rate
+            # keeps each one near 1.2 ms
+            self.ads.mode = ADS.Mode.SINGLE
+            self.ads.data_rate = 860
+        except Exception as e:
+            logger.warning(f"Could not set ADC data rate: {e}")
+        self.adc_sampler = AdcSampler({
+            'ammonia_ppm': (self.mq137_channel, lambda raw, voltage: self.convert_mq_to_ppm(raw, voltage, 'ammonia')),
+            'h2s_ppm': (self.mq136_channel, lambda raw, voltage: self.convert_mq_to_ppm(raw, voltage, 'h2s'))
+        }, rate_hz=rate_hz)
+        self.adc_sampler.start()
+        logger.info(f"Sampling MQ sensors at {rate_hz} Hz")
+    
     def read_mq137_ammonia(self):
         """Read ammonia concentration from MQ137 sensor"""
         if not ADC_AVAILABLE or not self.mq137_channel:
@@ -135,8 +415,9 @@ class FreezerSensors:
             
         try:
             # Read raw ADC value
-            raw_value = self.mq137_channel.value
-            voltage = self.mq137_channel.voltage
+            with tracing.span('read_mq137'):
+                raw_value = self.mq137_channel.value
+                voltage = self.mq137_channel.voltage
             
             # Convert to ammonia concentration (PPM)
             # This is a simplified conversion - you may need to calibrate
@@ -159,8 +440,9 @@ class FreezerSensors:
             
         try:
             # Read raw ADC value
-            raw_value = self.mq136_channel.value
-            voltage = self.mq136_channel.voltage
+            with tracing.span('read_mq136'):
+                raw_value = self.mq136_channel.value
+                voltage = self.mq136_channel.voltage
             
             # Convert to H2S concentration (PPM)
             h2s_ppm = self.convert_mq_to_ppm(raw_value, voltage, 'h2s')
@@ -202,6 +484,8 @@ class FreezerSensors:
         """Read door status from magnetic switch"""
         if not GPIO_AVAILABLE:
             return None
+        if self.door_edges_enabled:
+            return self.door_open
             
         try:
             # Magnetic switch: LOW when door is closed, HIGH when door is open
@@ -214,28 +498,48 @@ class FreezerSensors:
     def read_all_sensors(self):
         """Read all sensor data"""
         sensor_data = {
+            'device_id': self.device_id,
             'timestamp': datetime.utcnow().isoformat(),
             'co2_ppm': None,
             'ammonia_ppm': None,
             'h2s_ppm': None,
             'door_open': None,
-            'air_quality': 'unknown'
+            'air_quality': 'unknown',
+            'ammonia_stats': None,
+            'h2s_stats': None,
+            'temperature': None,
+            'humidity': None
         }
         
+        # Last good DHT22 values; never waits on the sensor
+        if self.dht:
+            sensor_data['temperature'], sensor_data['humidity'], _ = self.dht.latest()
+        
         # Read CO2 sensor
         co2_value = self.read_co2()
         if co2_value is not None:
             sensor_data['co2_ppm'] = co2_value
         
+        # The median of the MQ samples taken since the last reading is the
+        # reported value; the stats cover every sample since the last one sent
+        summaries = self.adc_sampler.summaries() if self.adc_sampler else {}
+        for metric, stats_key in (('ammonia_ppm', 'ammonia_stats'), ('h2s_ppm', 'h2s_stats')):
+            stats, median = summaries.get(metric, (None, None))
+            if median is not None:
+                sensor_data[metric] = median
+                sensor_data[stats_key] = stats
+        
         # Read ammonia sensor
-        ammonia_data = self.read_mq137_ammonia()
-        if ammonia_data:
-            sensor_data['ammonia_ppm'] = ammonia_data['ammonia_ppm']
+        if sensor_data['ammonia_ppm'] is None:
+            ammonia_data = self.read_mq137_ammonia()
+            if ammonia_data:
+                sensor_data['ammonia_ppm'] = ammonia_data['ammonia_ppm']
         
         # Read H2S sensor
-        h2s_data = self.read_mq136_h2s()
-        if h2s_data:
-            sensor_data['h2s_ppm'] = h2s_data['h2s_ppm']
+        if sensor_data['h2s_ppm'] is None:
+            h2s_data = self.read_mq136_h2s()
+            if h2s_data:
+                sensor_data['h2s_ppm'] = h2s_data['h2s_ppm']
         
         # Read door status
         door_status = self.read_door_status()
@@ -277,21 +581,40 @@ class FreezerSensors:
     def send_sensor_data(self, sensor_data):
         """Send sensor data to Flask application"""
         try:
-            response = requests.post(
-                f"{self.flask_url}/api/sensors",
-                json=sensor_data,
-                timeout=5
-            )
-            if response.status_code == 201:
-                logger.info("Sensor data sent successfully")
+            with tracing.span('send_sensor_data'), UPLOAD_LATENCY.time():
+                response = requests.post(
+                    f"{self.flask_url}/api/sensors",
+                    json=sensor_data,
+                    headers=tracing.trace_headers(),
+                    timeout=5
+                )
+            # 202: queued by the app and stored with its next batch
+            if response.status_code in (201, 202):
+                logger.debug("Sensor data sent successfully")
                 return True
             else:
+                UPLOAD_FAILURES.inc()
                 logger.error(f"Failed to send sensor data: {response.status_code}")
                 return False
         except requests.exceptions.RequestException as e:
+            UPLOAD_FAILURES.inc()
             logger.error(f"Error sending sensor data: {e}")
             return False
     
+    def upload(self, sensor_data):
+        """Send queued readings oldest first, then this one; keep what fails"""
+        self.upload_queue.append(sensor_data)
+        return self.flush_upload_queue()
+
+    def flush_upload_queue(self):
+        """Send queued readings oldest first until one fails"""
+        while self.upload_queue:
+            if not self.send_sensor_data(self.upload_queue[0]):
+                logger.warning(f"{len(self.upload_queue)} readings queued for retry")
+                return False
+            self.upload_queue.popleft()
+        return True
+    
     def check_spoilage_conditions(self, sensor_data):
         """Check for conditions that might cause spoilage"""
         warnings = []
@@ -308,6 +631,12 @@ class FreezerSensors:
         if sensor_data.get('h2s_ppm') and sensor_data['h2s_ppm'] > 10:
             warnings.append(f"High H2S detected: {sensor_data['h2s_ppm']:.2f} PPM - possible spoiled food")
         
+        # Temperature and humidity checks
+        if sensor_data.get('temperature') is not None and sensor_data['temperature'] > Config.TEMP_WARNING_THRESHOLD:
+            warnings.append(f"High temperature: {sensor_data['temperature']:.1f}°C")
+        if sensor_data.get('humidity') is not None and sensor_data['humidity'] > Config.HUMIDITY_WARNING_THRESHOLD:
+            warnings.append(f"High humidity: {sensor_data['humidity']:.1f}%")
+        
         # Door open check
         if sensor_data.get('door_open'):
             warnings.append("Door is open")
@@ -319,25 +648,45 @@ class FreezerSensors:
         return warnings
     
     def run_continuous_monitoring(self, interval=30):
-        """Run continuous sensor monitoring"""
-        logger.info(f"Starting continuous monitoring (interval: {interval}s)")
+        """Run continuous sensor monitoring
+
+        With a sampler the wait adapts to the readings; otherwise every
+        `interval` seconds.
+        """
+        if self.sampler:
+            logger.info(f"Starting adaptive monitoring ({self.sampler.fast_interval:g}-{self.sampler.slow_interval:g}s, "
+                        f"normally {self.sampler.base_interval:g}s)")
+        else:
+            logger.info(f"Starting continuous monitoring (interval: {interval}s)")
         
         try:
             while True:
-                # Read all sensors
-                sensor_data = self.read_all_sensors()
-                logger.info(f"Sensor data: {sensor_data}")
-                
-                # Send data to Flask app
-                self.send_sensor_data(sensor_data)
+                # One trace per reading, continued by the Flask app
+                with self.tracer.span('sensor_cycle', device_id=self.device_id):
+                    # Read all sensors
+                    sensor_data = self.read_all_sensors()
+                    logger.debug(f"Sensor data: {sensor_data}")
+                    
+                    # Send data to Flask app, retrying earlier failures first;
+                    # readings inside the deadband are only logged
+                    if self.deadband is None or self.deadband.check(sensor_data):
+                        self.upload(sensor_data)
+                        if self.adc_sampler:
+                            self.adc_sampler.commit()
+                    elif self.upload_queue:
+                        self.flush_upload_queue()
                 
                 # Check for spoilage conditions
                 warnings = self.check_spoilage_conditions(sensor_data)
                 if warnings:
                     logger.warning(f"Spoilage warnings: {', '.join(warnings)}")
                 
-                # Wait for next reading
-                time.sleep(interval)
+                # Wait for next reading; a door opening ends the wait early
+                wait = self.sampler.next_interval(sensor_data) if self.sampler else interval
+                if self.watchdog_file:
+                    write_watchdog(self.watchdog_file, wait)
+                self.wake_event.wait(wait)
+                self.wake_event.clear()
                 
         except KeyboardInterrupt:
             logger.info("Monitoring stopped by user")
@@ -349,9 +698,15 @@ class FreezerSensors:
     def cleanup(self):
         """Clean up resources"""
         try:
+            if self.adc_sampler:
+                self.adc_sampler.stop()
+            if self.dht:
+                self.dht.stop()
             if hasattr(self, 'co2_serial') and self.co2_serial:
                 self.co2_serial.close()
             if GPIO_AVAILABLE:
+                if self.door_edges_enabled:
+                    GPIO.remove_event_detect(self.door_sensor_pin)
                 GPIO.cleanup()
             logger.info("Cleanup completed")
         except Exception as e:
@@ -366,19 +721,91 @@ def main():
                        help='Flask application URL')
     parser.add_argument('--interval', type=int, default=30, 
                        help='Sensor reading interval in seconds')
+    parser.add_argument('--fixed-interval', action='store_true',
+                       help='Always wait --interval seconds instead of adapting the rate')
+    parser.add_argument('--fast-interval', type=float, default=2,
+                       help='Seconds between readings while the door is open or values change quickly')
+    parser.add_argument('--slow-interval', type=float, default=300,
+                       help='Longest wait between readings once values are stable')
+    parser.add_argument('--stable-readings', type=int, default=5,
+                       help='Unchanged readings before the wait is stretched again')
+    parser.add_argument('--backoff', type=float, default=2.0,
+                       help='Factor the wait grows by after each run of stable readings')
+    parser.add_argument('--send-every-reading', action='store_true',
+                       help='Transmit every reading instead of only those outside the deadband')
+    parser.add_argument('--heartbeat', type=float, default=300,
+                       help='Longest time without transmitting a reading, in seconds')
+    parser.add_argument('--co2-deadband', type=float, default=25.0,
+                       help='CO2 change in PPM that triggers a transmission')
+    parser.add_argument('--ammonia-deadband', type=float, default=1.0,
+                       help='Ammonia change in PPM that triggers a transmission')
+    parser.add_argument('--h2s-deadband', type=float, default=0.5,
+                       help='H2S change in PPM that triggers a transmission')
+    parser.add_argument('--temperature-deadband', type=float, default=0.5,
+                       help='Temperature change in °C that triggers a transmission')
+    parser.add_argument('--humidity-deadband', type=float, default=2.0,
+                       help='Humidity change in percent that triggers a transmission')
+    parser.add_argument('--device-id', default=None,
+                       help='Identifier reported with each reading (default: hostname)')
     parser.add_argument('--once', action='store_true', 
                        help='Read sensors once and exit')
+    parser.add_argument('--metrics-port', type=int, default=9101,
+                       help='Port serving Prometheus metrics (0 disables)')
+    parser.add_argument('--adc-rate', type=float, default=50,
+                       help='MQ sensor samples per second between readings (0 reads once per interval)')
+    parser.add_argument('--dht-pin', type=int, default=Config.DHT_PIN,
+                       help='GPIO pin of the DHT22 temperature/humidity sensor')
+    parser.add_argument('--watchdog-file', default=None,
+                       help='File refreshed every cycle so a supervisor can detect a stuck loop')
+    parser.add_argument('--door-bounce-ms', type=int, default=200,
+                       help='Debounce time for door switch edges in milliseconds')
+    parser.add_argument('--trace-file', default=None,
+                       help='Append trace spans of each reading to this JSON Lines file')
+    parser.add_argument('--log-file', default=os.environ.get('LOG_FILE'),
+                       help='Also write logs to this size-rotated file')
+    parser.add_argument('--log-level', default=os.environ.get('LOG_LEVEL', 'INFO'),
+                       help='Minimum level logged (DEBUG includes every reading)')
     
     args = parser.parse_args()
     
+    setup_logging('sensors', level=args.log_level.upper(), log_file=args.log_file)
+    
+    if args.metrics_port and not args.once:
+        serve_metrics(args.metrics_port)
+        logger.info(f"Metrics available on port {args.metrics_port}/metrics")
+    
     # Create sensor monitor
-    monitor = FreezerSensors(flask_url=args.url)
+    exporter = tracing.JsonlExporter(args.trace_file) if args.trace_file else None
+    monitor = FreezerSensors(flask_url=args.url, device_id=args.device_id,
+                             tracer=tracing.Tracer('sensors', exporter),
+                             door_bounce_ms=args.door_bounce_ms,
+                             adc_rate_hz=0 if args.once else args.adc_rate,
+                             dht_pin=args.dht_pin,
+                             watchdog_file=args.watchdog_file,
+                             sampler=None if args.fixed_interval else AdaptiveSampler(
+                                 interval=args.interval,
+                                 fast_interval=args.fast_interval,
+                                 slow_interval=args.slow_interval,
+                                 stable_readings=args.stable_readings,
+                                 backoff=args.backoff),
+                             deadband=None if args.send_every_reading else DeadbandFilter(
+                                 deadbands={
+                                     'co2_ppm': args.co2_deadband,
+                                     'ammonia_ppm': args.ammonia_deadband,
+                                     'h2s_ppm': args.h2s_deadband,
+                                     'temperature': args.temperature_deadband,
+                                     'humidity': args.humidity_deadband
+                                 },
+                                 heartbeat=args.heartbeat))
     
     if args.once:
         # Single reading
-        sensor_data = monitor.read_all_sensors()
-        print(json.dumps(sensor_data, indent=2))
-        monitor.send_sensor_data(sensor_data)
+        with monitor.tracer.span('sensor_cycle', device_id=monitor.device_id):
+            if monitor.dht:
+                monitor.dht.read_once()
+            sensor_data = monitor.read_all_sensors()
+            print(json.dumps(sensor_data, indent=2))
+            monitor.send_sensor_data(sensor_data)
     else:
         # Continuous monitoring
         monitor.run_continuous_monitoring(interval=args.interval)
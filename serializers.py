@@ -0,0 +1,94 @@
+"""
+JSON serialization for Freezer Inventory System
+Encodes API responses with orjson when it is installed and streams large
+row sets page by page as a JSON array or NDJSON
+"""
+
+import json
+import logging
+import time
+from flask import Response, stream_with_context
+from metrics import Counter, Histogram
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+JSON_ENCODE_LATENCY = Histogram('json_encode_seconds', 'Time spent encoding JSON payloads',
+                                buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5))
+STREAM_ERRORS = Counter('json_stream_errors_total', 'Streamed lists cut short by an error after the response started')
+
+
+def dumps(obj):
+    """Encode an object as compact UTF-8 JSON bytes"""
+    start = time.perf_counter()
+    if ORJSON_AVAILABLE:
+        body = orjson.dumps(obj)
+    else:
+        body = json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8')
+    JSON_ENCODE_LATENCY.observe(time.perf_counter() - start)
+    return body
+
+
+def json_response(obj, status=200):
+    """Response with a JSON body encoded by the fast path"""
+    return Response(dumps(obj), status=status, mimetype='application/json')
+
+
+def wants_ndjson(request):
+    """True when the client asked for newline-delimited JSON"""
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def _error_marker(error):
+    """Last element of a list whose remaining pages could not be fetched"""
+    STREAM_ERRORS.inc()
+    logger.error(f"Streamed list cut short: {error}")
+    return dumps({'error': str(error), 'truncated': True})
+
+
+def _json_array_chunks(pages):
+    yield b'['
+    first = True
+    try:
+        for page in pages:
+            if not page:
+                continue
+            # Encode the whole page at once and drop its brackets
+            body = dumps(page)[1:-1]
+            yield body if first else b',' + body
+            first = False
+    except Exception as e:
+        marker = _error_marker(e)
+        yield marker if first else b',' + marker
+    yield b']'
+
+
+def _ndjson_chunks(pages):
+    try:
+        for page in pages:
+            if page:
+                yield b'\n'.join(dumps(row) for row in page) + b'\n'
+    except Exception as e:
+        yield _error_marker(e) + b'\n'
+
+
+def stream_rows(pages, ndjson=False):
+    """Chunked response over an iterable of row pages
+
+    Only one page is held in memory at a time and the first bytes go out as
+    soon as the first page has been fetched. The status is sent by then, so
+    a page that fails later ends the list with an
+    {"error": ..., "truncated": true} element instead of cutting it off.
+    """
+    if ndjson:
+        return Response(stream_with_context(_ndjson_chunks(pages)), mimetype=NDJSON_MIMETYPE)
+    return Response(stream_with_context(_json_array_chunks(pages)), mimetype='application/json')
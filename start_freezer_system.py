@@ -4,124 +4,46 @@ Startup script for the Freezer Inventory System
 This script starts both the Flask web server and sensor monitoring
 """
 
-import subprocess
-import time
-import signal
-import sys
+import logging
 import os
-from threading import Thread
+import sys
+from supervisor import ManagedProcess, Supervisor, gunicorn_command
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_DIR = os.environ.get('FREEZER_LOG_DIR', os.path.join(APP_DIR, 'logs'))
+APP_URL = os.environ.get('FREEZER_APP_URL', 'http://localhost:5000')
 
 class FreezerSystem:
     def __init__(self):
-        self.flask_process = None
-        self.sensor_process = None
-        self.running = False
-    
-    def start_flask_app(self):
-        """Start the Flask web application"""
-        try:
-            print("Starting Flask web application...")
-            self.flask_process = subprocess.Popen([
-                sys.executable, 'app.py'
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            print("Flask app started on http://0.0.0.0:5000")
-            return True
-        except Exception as e:
-            print(f"Error starting Flask app: {e}")
-            return False
-    
-    def start_sensor_monitoring(self):
-        """Start the sensor monitoring process"""
-        try:
-            print("Starting sensor monitoring...")
-            self.sensor_process = subprocess.Popen([
-                sys.executable, 'sensors.py', '--interval', '30'
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            print("Sensor monitoring started")
-            return True
-        except Exception as e:
-            print(f"Error starting sensor monitoring: {e}")
-            return False
-    
-    def stop_processes(self):
-        """Stop all running processes"""
-        print("Stopping processes...")
-        
-        if self.sensor_process:
-            self.sensor_process.terminate()
-            try:
-                self.sensor_process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self.sensor_process.kill()
-        
-        if self.flask_process:
-            self.flask_process.terminate()
-            try:
-                self.flask_process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self.flask_process.kill()
-        
-        print("All processes stopped")
-    
-    def signal_handler(self, signum, frame):
-        """Handle shutdown signals"""
-        print(f"\nReceived signal {signum}, shutting down...")
-        self.running = False
-        self.stop_processes()
-        sys.exit(0)
+        # Restarted when /healthz stops answering; the sensor daemon waits for
+        # /readyz, which also needs storage, the queues and the mirror
+        self.flask = ManagedProcess(
+            'flask', gunicorn_command(APP_DIR),
+            log_file=os.path.join(LOG_DIR, 'flask.log'),
+            health_url=f"{APP_URL}/healthz",
+            ready_url=f"{APP_URL}/readyz"
+        )
+        self.sensors = ManagedProcess(
+            'sensors', [sys.executable, 'sensors.py', '--interval', '30', '--url', APP_URL,
+                        '--watchdog-file', os.path.join(LOG_DIR, 'sensors.watchdog')],
+            log_file=os.path.join(LOG_DIR, 'sensors.log'),
+            watchdog_file=os.path.join(LOG_DIR, 'sensors.watchdog')
+        )
+        # The sensor daemon posts to the app, so it starts once the app is ready
+        self.supervisor = Supervisor([self.flask, self.sensors])
     
     def run(self):
         """Run the complete system"""
-        # Set up signal handlers
-        signal.signal(signal.SIGINT, self.signal_handler)
-        signal.signal(signal.SIGTERM, self.signal_handler)
-        
         print("=== Freezer Inventory System ===")
         print("Starting system components...")
-        
-        # Start Flask app
-        if not self.start_flask_app():
-            print("Failed to start Flask app, exiting...")
-            return
-        
-        # Wait a moment for Flask to start
-        time.sleep(3)
-        
-        # Start sensor monitoring
-        if not self.start_sensor_monitoring():
-            print("Failed to start sensor monitoring, but Flask app is running")
-        
-        self.running = True
-        
+        print(f"Logs: {LOG_DIR}")
         print("\n=== System Status ===")
-        print("Web Dashboard: http://localhost:5000")
-        print("Touch Interface: http://localhost:5000/touch")
+        print(f"Web Dashboard: {APP_URL}")
+        print(f"Touch Interface: {APP_URL}/touch")
         print("Press Ctrl+C to stop the system")
         print("=" * 40)
-        
-        try:
-            # Monitor processes
-            while self.running:
-                # Check if Flask process is still running
-                if self.flask_process and self.flask_process.poll() is not None:
-                    print("Flask app stopped unexpectedly")
-                    break
-                
-                # Check if sensor process is still running
-                if self.sensor_process and self.sensor_process.poll() is not None:
-                    print("Sensor monitoring stopped unexpectedly")
-                    # Restart sensor monitoring
-                    if self.running:
-                        print("Restarting sensor monitoring...")
-                        self.start_sensor_monitoring()
-                
-                time.sleep(5)
-        
-        except KeyboardInterrupt:
-            print("\nShutdown requested by user")
-        
-        finally:
-            self.stop_processes()
+        self.supervisor.run()
+        print("All processes stopped")
 
 def main():
     """Main function"""
@@ -159,6 +81,7 @@ def main():
         print("⚠ ADC modules not available - MQ sensors will be disabled")
     
     # Start the system
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     system = FreezerSystem()
     system.run()
 
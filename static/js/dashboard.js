@@ -1,11 +1,14 @@
 // Dashboard JavaScript
 let inventoryData = [];
 let sensorData = {};
+let dashboardSummary = null;
+let pendingSyncTimer = null;
+// Sent with the add form; a resubmission after a lost response reuses it
+let addFormClientKey = newClientKey();
 
 // Initialize dashboard
 document.addEventListener('DOMContentLoaded', function() {
-    loadInventory();
-    loadSensorData();
+    loadInitialState();
     checkSpoilage();
     
     // Setup form submission
@@ -16,29 +19,67 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Auto-refresh every 30 seconds
     setInterval(() => {
-        loadInventory();
-        loadSensorData();
+        loadDashboard();
     }, 30000);
 });
 
-async function loadInventory() {
-    try {
-        const response = await fetch('/api/inventory');
-        inventoryData = await response.json();
-        renderInventoryList();
-    } catch (error) {
-        console.error('Error loading inventory:', error);
-        showToast('Error loading inventory data', 'danger');
+function applySnapshot(snapshot) {
+    inventoryData = snapshot.items;
+    sensorData = snapshot.latest_reading;
+    dashboardSummary = snapshot.summary;
+    renderInventoryList();
+    updateSensorDisplay();
+    updatePendingSync(snapshot.pending_sync);
+}
+
+function newClientKey() {
+    // crypto.randomUUID is only available on https and localhost
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+function updatePendingSync(pendingSync) {
+    // Changes saved on the Pi that have not reached the cloud database yet
+    const element = document.getElementById('pending-sync');
+    if (!element) return;
+    const pending = pendingSync ? pendingSync.pending : 0;
+    const failed = pendingSync && pendingSync.failed ? pendingSync.failed : 0;
+    element.classList.toggle('d-none', pending === 0 && failed === 0);
+    const parts = [];
+    if (pending > 0) parts.push(pending === 1 ? '1 change waiting to sync' : `${pending} changes waiting to sync`);
+    if (failed > 0) parts.push(failed === 1 ? '1 change refused by the database' : `${failed} changes refused by the database`);
+    element.textContent = parts.join(', ');
+    element.title = pendingSync && pendingSync.last_error ? `Last sync error: ${pendingSync.last_error}` : '';
+    clearTimeout(pendingSyncTimer);
+    if (pending > 0) {
+        // Check back sooner than the regular refresh so the indicator clears promptly
+        pendingSyncTimer = setTimeout(loadDashboard, 5000);
+    }
+}
+
+function loadInitialState() {
+    // The server inlines the current snapshot so the first paint needs no request
+    const element = document.getElementById('initial-state');
+    const snapshot = element ? JSON.parse(element.textContent) : null;
+    if (snapshot) {
+        applySnapshot(snapshot);
+    } else {
+        loadDashboard();
     }
 }
 
-async function loadSensorData() {
+async function loadDashboard() {
+    // One request returns the inventory, latest reading and summary counts
     try {
-        const response = await fetch('/api/sensors');
-        sensorData = await response.json();
-        updateSensorDisplay();
+        const response = await fetch('/api/dashboard');
+        if (!response.ok) {
+            // Keep showing the last snapshot while storage is unavailable
+            throw new Error(`Dashboard request failed: ${response.status}`);
+        }
+        applySnapshot(await response.json());
     } catch (error) {
-        console.error('Error loading sensor data:', error);
+        console.error('Error loading dashboard:', error);
+        showToast('Error loading inventory data', 'danger');
     }
 }
 
@@ -179,7 +220,7 @@ function updateSensorDisplay() {
     }
 
     // Update spoiled count
-    const spoiledCount = inventoryData.filter(item => item.is_spoiled).length;
+    const spoiledCount = dashboardSummary ? dashboardSummary.spoiled : inventoryData.filter(item => item.is_spoiled).length;
     document.getElementById('spoiled-count').textContent = spoiledCount;
 
     // Update timestamp
@@ -201,7 +242,8 @@ async function addItem() {
         unit: document.getElementById('item-unit').value,
         category: document.getElementById('item-category').value,
         notes: document.getElementById('item-notes').value,
-        expiry_date: document.getElementById('item-expiry').value || null
+        expiry_date: document.getElementById('item-expiry').value || null,
+        client_key: addFormClientKey
     };
 
     if (!itemData.name || !itemData.quantity) {
@@ -220,7 +262,8 @@ async function addItem() {
 
         if (response.ok) {
             form.reset();
-            loadInventory();
+            addFormClientKey = newClientKey();
+            loadDashboard();
             showToast('Item added successfully!', 'success');
         } else {
             throw new Error('Failed to add item');
@@ -240,7 +283,7 @@ async function deleteItem(itemId) {
         });
 
         if (response.ok) {
-            loadInventory();
+            loadDashboard();
             showToast('Item deleted successfully!', 'success');
         } else {
             throw new Error('Failed to delete item');
@@ -254,6 +297,9 @@ async function deleteItem(itemId) {
 async function checkSpoilage() {
     try {
         const response = await fetch('/api/check_spoilage');
+        if (!response.ok) {
+            return;
+        }
         const result = await response.json();
         
         if (result.spoiled_items.length > 0) {
@@ -264,15 +310,17 @@ async function checkSpoilage() {
             showToast('Door is open! Please close the fridge door.', 'warning');
         }
         
-        loadInventory();
+        // Only re-render when the check just marked items as spoiled
+        if (result.spoiled_items.length > 0) {
+            loadDashboard();
+        }
     } catch (error) {
         console.error('Error checking spoilage:', error);
     }
 }
 
 function refreshData() {
-    loadInventory();
-    loadSensorData();
+    loadDashboard();
     checkSpoilage();
     showToast('Data refreshed!', 'success');
 }
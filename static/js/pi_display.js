@@ -1,18 +1,20 @@
 // Pi Display JavaScript - Optimized for touch screen
 let inventoryData = [];
 let sensorData = {};
+let dashboardSummary = null;
+let pendingSyncTimer = null;
+// Sent with the add form; a resubmission after a lost response reuses it
+let addFormClientKey = newClientKey();
 
 // Initialize display
 document.addEventListener('DOMContentLoaded', function() {
     updateCurrentTime();
     setInterval(updateCurrentTime, 1000);
-    loadInventory();
-    loadSensorData();
+    loadInitialState();
     
     // Auto-refresh every 30 seconds
     setInterval(() => {
-        loadInventory();
-        loadSensorData();
+        loadDashboard();
     }, 30000);
     
     // Auto-refresh every 5 minutes for full data sync
@@ -61,24 +63,63 @@ function updateCurrentTime() {
     document.getElementById('current-time').textContent = timeString;
 }
 
-async function loadInventory() {
-    try {
-        const response = await fetch('/api/inventory');
-        inventoryData = await response.json();
-        renderInventoryList();
-    } catch (error) {
-        console.error('Error loading inventory:', error);
-        showAlert('Error loading inventory data', 'error');
+function applySnapshot(snapshot) {
+    inventoryData = snapshot.items;
+    sensorData = snapshot.latest_reading;
+    dashboardSummary = snapshot.summary;
+    renderInventoryList();
+    updateSensorDisplay();
+    updatePendingSync(snapshot.pending_sync);
+}
+
+function newClientKey() {
+    // crypto.randomUUID is only available on https and localhost
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+function updatePendingSync(pendingSync) {
+    // Changes saved on the Pi that have not reached the cloud database yet
+    const element = document.getElementById('pending-sync');
+    if (!element) return;
+    const pending = pendingSync ? pendingSync.pending : 0;
+    const failed = pendingSync && pendingSync.failed ? pendingSync.failed : 0;
+    element.classList.toggle('d-none', pending === 0 && failed === 0);
+    const parts = [];
+    if (pending > 0) parts.push(pending === 1 ? '1 change waiting to sync' : `${pending} changes waiting to sync`);
+    if (failed > 0) parts.push(failed === 1 ? '1 change refused by the database' : `${failed} changes refused by the database`);
+    element.textContent = parts.join(', ');
+    element.title = pendingSync && pendingSync.last_error ? `Last sync error: ${pendingSync.last_error}` : '';
+    clearTimeout(pendingSyncTimer);
+    if (pending > 0) {
+        // Check back sooner than the regular refresh so the indicator clears promptly
+        pendingSyncTimer = setTimeout(loadDashboard, 5000);
     }
 }
 
-async function loadSensorData() {
+function loadInitialState() {
+    // The server inlines the current snapshot so the first paint needs no request
+    const element = document.getElementById('initial-state');
+    const snapshot = element ? JSON.parse(element.textContent) : null;
+    if (snapshot) {
+        applySnapshot(snapshot);
+    } else {
+        loadDashboard();
+    }
+}
+
+async function loadDashboard() {
+    // One request returns the inventory, latest reading and summary counts
     try {
-        const response = await fetch('/api/sensors');
-        sensorData = await response.json();
-        updateSensorDisplay();
+        const response = await fetch('/api/dashboard');
+        if (!response.ok) {
+            // Keep showing the last snapshot while storage is unavailable
+            throw new Error(`Dashboard request failed: ${response.status}`);
+        }
+        applySnapshot(await response.json());
     } catch (error) {
-        console.error('Error loading sensor data:', error);
+        console.error('Error loading dashboard:', error);
+        showAlert('Error loading inventory data', 'error');
     }
 }
 
@@ -276,7 +317,7 @@ function updateSensorDisplay() {
     }
 
     // Update spoiled count
-    const spoiledCount = inventoryData.filter(item => item.is_spoiled).length;
+    const spoiledCount = dashboardSummary ? dashboardSummary.spoiled : inventoryData.filter(item => item.is_spoiled).length;
     const spoiledElement = document.getElementById('spoiled-count');
     const alertCard = document.getElementById('spoilage-alert');
     
@@ -314,7 +355,8 @@ async function addItem() {
         unit: document.getElementById('item-unit').value,
         category: document.getElementById('item-category').value,
         notes: document.getElementById('item-notes').value,
-        expiry_date: document.getElementById('item-expiry').value || null
+        expiry_date: document.getElementById('item-expiry').value || null,
+        client_key: addFormClientKey
     };
 
     // Validate required fields
@@ -336,7 +378,8 @@ async function addItem() {
             const modal = bootstrap.Modal.getInstance(document.getElementById('addItemModal'));
             modal.hide();
             form.reset();
-            loadInventory();
+            addFormClientKey = newClientKey();
+            loadDashboard();
             showAlert('Item added successfully!', 'success');
         } else {
             throw new Error('Failed to add item');
@@ -375,7 +418,7 @@ async function updateItemQuantity(itemId, newQuantity) {
         });
 
         if (response.ok) {
-            loadInventory();
+            loadDashboard();
             showAlert('Item updated successfully!', 'success');
         } else {
             throw new Error('Failed to update item');
@@ -387,8 +430,7 @@ async function updateItemQuantity(itemId, newQuantity) {
 }
 
 function refreshData() {
-    loadInventory();
-    loadSensorData();
+    loadDashboard();
     showAlert('Data refreshed!', 'info');
 }
 
@@ -1,12 +1,15 @@
 // Touch Interface JavaScript
 let inventoryData = [];
 let sensorData = {};
+let dashboardSummary = null;
+let pendingSyncTimer = null;
+// Sent with the add form; a resubmission after a lost response reuses it
+let addFormClientKey = newClientKey();
 let selectedCategory = '';
 
 // Initialize touch interface
 document.addEventListener('DOMContentLoaded', function() {
-    loadInventory();
-    loadSensorData();
+    loadInitialState();
     
     // Set up category button handlers
     document.querySelectorAll('.category-btn').forEach(btn => {
@@ -28,29 +31,67 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Auto-refresh every 30 seconds
     setInterval(() => {
-        loadInventory();
-        loadSensorData();
+        loadDashboard();
     }, 30000);
 });
 
-async function loadInventory() {
-    try {
-        const response = await fetch('/api/inventory');
-        inventoryData = await response.json();
-        renderInventoryList();
-    } catch (error) {
-        console.error('Error loading inventory:', error);
-        showMessage('Error loading inventory data', 'error');
+function applySnapshot(snapshot) {
+    inventoryData = snapshot.items;
+    sensorData = snapshot.latest_reading;
+    dashboardSummary = snapshot.summary;
+    renderInventoryList();
+    updateSensorDisplay();
+    updatePendingSync(snapshot.pending_sync);
+}
+
+function newClientKey() {
+    // crypto.randomUUID is only available on https and localhost
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+function updatePendingSync(pendingSync) {
+    // Changes saved on the Pi that have not reached the cloud database yet
+    const element = document.getElementById('pending-sync');
+    if (!element) return;
+    const pending = pendingSync ? pendingSync.pending : 0;
+    const failed = pendingSync && pendingSync.failed ? pendingSync.failed : 0;
+    element.classList.toggle('d-none', pending === 0 && failed === 0);
+    const parts = [];
+    if (pending > 0) parts.push(pending === 1 ? '1 change waiting to sync' : `${pending} changes waiting to sync`);
+    if (failed > 0) parts.push(failed === 1 ? '1 change refused by the database' : `${failed} changes refused by the database`);
+    element.textContent = parts.join(', ');
+    element.title = pendingSync && pendingSync.last_error ? `Last sync error: ${pendingSync.last_error}` : '';
+    clearTimeout(pendingSyncTimer);
+    if (pending > 0) {
+        // Check back sooner than the regular refresh so the indicator clears promptly
+        pendingSyncTimer = setTimeout(loadDashboard, 5000);
     }
 }
 
-async function loadSensorData() {
+function loadInitialState() {
+    // The server inlines the current snapshot so the first paint needs no request
+    const element = document.getElementById('initial-state');
+    const snapshot = element ? JSON.parse(element.textContent) : null;
+    if (snapshot) {
+        applySnapshot(snapshot);
+    } else {
+        loadDashboard();
+    }
+}
+
+async function loadDashboard() {
+    // One request returns the inventory, latest reading and summary counts
     try {
-        const response = await fetch('/api/sensors');
-        sensorData = await response.json();
-        updateSensorDisplay();
+        const response = await fetch('/api/dashboard');
+        if (!response.ok) {
+            // Keep showing the last snapshot while storage is unavailable
+            throw new Error(`Dashboard request failed: ${response.status}`);
+        }
+        applySnapshot(await response.json());
     } catch (error) {
-        console.error('Error loading sensor data:', error);
+        console.error('Error loading dashboard:', error);
+        showMessage('Error loading inventory data', 'error');
     }
 }
 
@@ -58,7 +99,7 @@ function updateSensorDisplay() {
     // Update temperature
     const tempElement = document.getElementById('touch-temp');
     const tempCard = document.getElementById('touch-temp-card');
-    if (sensorData.temperature !== undefined) {
+    if (sensorData.temperature != null) {
         tempElement.textContent = `${sensorData.temperature.toFixed(1)}°C`;
         
         // Color code based on temperature
@@ -77,7 +118,7 @@ function updateSensorDisplay() {
     // Update humidity
     const humidityElement = document.getElementById('touch-humidity');
     const humidityCard = document.getElementById('touch-humidity-card');
-    if (sensorData.humidity !== undefined) {
+    if (sensorData.humidity != null) {
         humidityElement.textContent = `${sensorData.humidity.toFixed(1)}%`;
         
         // Color code based on humidity
@@ -189,7 +230,8 @@ async function addItem() {
         unit: document.getElementById('touch-unit').value,
         category: selectedCategory || '',
         notes: '',
-        expiry_date: document.getElementById('touch-expiry').value || null
+        expiry_date: document.getElementById('touch-expiry').value || null,
+        client_key: addFormClientKey
     };
 
     // Validate required fields
@@ -224,12 +266,13 @@ async function addItem() {
             
             // Reset form
             form.reset();
+            addFormClientKey = newClientKey();
             document.querySelectorAll('.category-btn').forEach(btn => btn.classList.remove('active'));
             selectedCategory = '';
             document.getElementById('touch-category').value = '';
             
             // Reload inventory
-            loadInventory();
+            loadDashboard();
         } else {
             throw new Error('Failed to add item');
         }
@@ -252,7 +295,7 @@ async function removeItem(itemId) {
         });
 
         if (response.ok) {
-            loadInventory();
+            loadDashboard();
             showMessage('Item removed successfully!', 'success');
         } else {
             throw new Error('Failed to remove item');
@@ -0,0 +1,810 @@
+"""
+Storage backend for Freezer Inventory System
+Keeps every Supabase query behind a small set of named operations and
+creates the client lazily, once per process, so the app is fork-safe
+"""
+
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import io
+import json
+import os
+import random
+import threading
+import time
+import tracing
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from metrics import Counter, Gauge, Histogram
+from profiling import handed_off
+
+STORAGE_LATENCY = Histogram('storage_call_duration_seconds', 'Storage round trip time', ['table', 'operation'])
+STORAGE_ERRORS = Counter('storage_errors_total', 'Storage calls that raised', ['table', 'operation'])
+STORAGE_RETRIES = Counter('storage_retries_total', 'Read attempts repeated after a failure', ['operation'])
+STALE_READS = Counter('storage_stale_reads_total', 'Reads answered from the last good result', ['operation'])
+BREAKER_OPEN = Gauge('storage_circuit_open', '1 while the storage circuit breaker is rejecting calls')
+
+# Operations safe to retry and to answer from their last good result
+READ_OPERATIONS = ('list_items', 'list_unspoiled_items', 'latest_sensor', 'sensor_history', 'sensor_anomalies',
+                   'door_events', 'door_state_before', 'latest_reading_times')
+WRITE_OPERATIONS = ('insert_item', 'insert_items', 'update_item', 'delete_item', 'mark_spoiled', 'insert_sensor', 'insert_sensors',
+                    'insert_door_events')
+STREAM_OPERATIONS = ('iter_items', 'iter_sensor_history', 'iter_items_changed_since', 'iter_sensors_created_since',
+                     'iter_item_ids')
+
+# Seconds left before the caller's deadline, set by ResilientStorage around each call;
+# backends shorten their own timeouts to it
+CALL_TIMEOUT = contextvars.ContextVar('storage_call_timeout', default=None)
+
+# SQLSTATE classes and PostgREST codes that mean the database itself is in trouble:
+# connection exceptions, resource limits, cancelled statements, internal errors,
+# and PostgREST failing to reach the database
+_OUTAGE_SQLSTATE_CLASSES = ('08', '53', '57', '58', 'XX')
+_OUTAGE_POSTGREST_CODES = ('PGRST000', 'PGRST001', 'PGRST002', 'PGRST003')
+
+
+def is_outage(error):
+    """True for transport errors, timeouts and 5xx-type database failures
+
+    Anything else, such as a rejected insert or a malformed filter, is the
+    caller's problem and says nothing about whether storage is healthy.
+    """
+    if isinstance(error, (StorageUnavailable, TimeoutError, ConnectionError)):
+        return True
+    module = type(error).__module__ or ''
+    if module.startswith('httpx') or module.startswith('httpcore'):
+        import httpx
+        return isinstance(error, (httpx.TransportError, httpx.TimeoutException))
+    if module.startswith('psycopg2'):
+        import psycopg2
+        if isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            return True
+        return (getattr(error, 'pgcode', None) or '')[:2] in _OUTAGE_SQLSTATE_CLASSES
+    if module.startswith('postgrest'):
+        code = getattr(error, 'code', None)
+        if isinstance(code, int):
+            # Non-JSON error bodies carry the HTTP status instead
+            return code >= 500
+        code = str(code or '')
+        return code in _OUTAGE_POSTGREST_CODES or (len(code) == 5 and code[:2] in _OUTAGE_SQLSTATE_CLASSES)
+    return isinstance(error, OSError)
+
+
+# Columns returned to API clients, so rows can be serialized without reshaping
+ITEM_COLUMNS = 'id,name,quantity,unit,added_date,expiry_date,category,notes,is_spoiled,qr_code'
+SENSOR_COLUMNS = 'id,device_id,timestamp,co2_ppm,ammonia_ppm,h2s_ppm,door_open,air_quality,is_anomaly,anomalies,ammonia_stats,h2s_stats,temperature,humidity'
+DOOR_EVENT_COLUMNS = 'id,device_id,state,occurred_at'
+
+
+class SupabaseStorage:
+    """Inventory and sensor persistence through the Supabase REST API"""
+
+    def __init__(self, url, key, timeout=5):
+        self.url = url
+        self.key = key
+        self.timeout = timeout
+        self._client = None
+        self._client_pid = None
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """Supabase client owned by the current process, created on first use"""
+        pid = os.getpid()
+        if self._client is None or self._client_pid != pid:
+            with self._lock:
+                if self._client is None or self._client_pid != pid:
+                    # supabase pulls in httpx/postgrest/gotrue; import it on
+                    # first use so cold starts that never query don't pay for it
+                    from supabase import create_client
+                    from supabase.lib.client_options import ClientOptions
+                    options = ClientOptions(postgrest_client_timeout=self.timeout)
+                    self._client = create_client(self.url, self.key, options=options)
+                    self._client_pid = pid
+        return self._client
+
+    def reset(self):
+        """Forget the current client so the next call opens new connections"""
+        with self._lock:
+            self._client = None
+            self._client_pid = None
+
+    # Inventory items
+    def list_items(self):
+        response = self._execute('inventory_item', 'list_items', self.client.table('inventory_item').select('*').order('added_date', desc=True))
+        return response.data
+
+    def iter_items(self, page_size):
+        """Yield API-shaped inventory rows one page at a time, newest first"""
+        query = self.client.table('inventory_item').select(ITEM_COLUMNS).order('added_date', desc=True).order('id', desc=True)
+        return self._pages('inventory_item', 'iter_items', query, page_size)
+
+    def list_unspoiled_items(self):
+        response = self._execute('inventory_item', 'list_unspoiled_items', self.client.table('inventory_item').select('*').eq('is_spoiled', False))
+        return response.data
+
+    def insert_item(self, item_data):
+        response = self._execute('inventory_item', 'insert_item', self.client.table('inventory_item').insert(item_data))
+        return response.data[0] if response.data else None
+
+    def insert_items(self, rows):
+        """Insert many items in one request; rows whose client_key is already stored are skipped"""
+        if not rows:
+            return []
+        response = self._execute('inventory_item', 'insert_items', self.client.table('inventory_item').upsert(rows, on_conflict='client_key', ignore_duplicates=True))
+        return response.data
+
+    def update_item(self, item_id, update_data):
+        response = self._execute('inventory_item', 'update_item', self.client.table('inventory_item').update(update_data).eq('id', item_id))
+        return response.data[0] if response.data else None
+
+    def delete_item(self, item_id):
+        self._execute('inventory_item', 'delete_item', self.client.table('inventory_item').delete().eq('id', item_id))
+
+    def mark_spoiled(self, item_ids):
+        """Flag several items as spoiled in a single round trip"""
+        if not item_ids:
+            return []
+        response = self._execute('inventory_item', 'mark_spoiled', self.client.table('inventory_item').update({'is_spoiled': True}).in_('id', list(item_ids)))
+        return response.data
+
+    # Sensor readings
+    def latest_sensor(self, since):
+        response = self._execute('sensor_data', 'latest_sensor', self.client.table('sensor_data').select('*').gte('timestamp', since).order('timestamp', desc=True).limit(1))
+        return response.data[0] if response.data else None
+
+    def insert_sensor(self, sensor_data):
+        response = self._execute('sensor_data', 'insert_sensor', self.client.table('sensor_data').insert(sensor_data))
+        return response.data[0] if response.data else None
+
+    def insert_sensors(self, rows):
+        """Insert many readings in one request without echoing them back"""
+        if rows:
+            self._execute('sensor_data', 'insert_sensors', self.client.table('sensor_data').insert(rows, returning='minimal'))
+
+    def sensor_history(self, since):
+        response = self._execute('sensor_data', 'sensor_history', self.client.table('sensor_data').select('*').gte('timestamp', since).order('timestamp', desc=False))
+        return response.data
+
+    def iter_sensor_history(self, since, page_size):
+        """Yield API-shaped sensor rows since a timestamp one page at a time"""
+        query = self.client.table('sensor_data').select(SENSOR_COLUMNS).gte('timestamp', since).order('timestamp', desc=False).order('id', desc=False)
+        return self._pages('sensor_data', 'iter_sensor_history', query, page_size)
+
+    def sensor_anomalies(self, since, limit, device_id=None):
+        query = self.client.table('sensor_data').select('*').eq('is_anomaly', True).gte('timestamp', since)
+        if device_id:
+            query = query.eq('device_id', device_id)
+        response = self._execute('sensor_data', 'sensor_anomalies', query.order('timestamp', desc=True).limit(limit))
+        return response.data
+
+    # Door events
+    def insert_door_events(self, events):
+        response = self._execute('door_event', 'insert_door_events', self.client.table('door_event').insert(events))
+        return response.data
+
+    def door_events(self, since, device_id=None):
+        """Open/close edges since a timestamp, oldest first"""
+        query = self.client.table('door_event').select(DOOR_EVENT_COLUMNS).gte('occurred_at', since)
+        if device_id:
+            query = query.eq('device_id', device_id)
+        response = self._execute('door_event', 'door_events', query.order('occurred_at', desc=False))
+        return response.data
+
+    def door_state_before(self, before, device_id=None):
+        """Last edge before a timestamp, for doors already open when a window starts"""
+        query = self.client.table('door_event').select(DOOR_EVENT_COLUMNS).lt('occurred_at', before)
+        if device_id:
+            query = query.eq('device_id', device_id)
+        response = self._execute('door_event', 'door_state_before', query.order('occurred_at', desc=True).limit(1))
+        return response.data[0] if response.data else None
+
+    # Change feeds for the local mirror
+    def iter_items_changed_since(self, since, page_size):
+        """Yield items updated at or after a timestamp, oldest change first"""
+        query = self.client.table('inventory_item').select('*').gte('updated_at', since).order('updated_at', desc=False).order('id', desc=False)
+        return self._pages('inventory_item', 'iter_items_changed_since', query, page_size)
+
+    def iter_item_ids(self, page_size):
+        """Yield pages of {'id': ...} for every item, to find deleted ones"""
+        query = self.client.table('inventory_item').select('id').order('id', desc=False)
+        return self._pages('inventory_item', 'iter_item_ids', query, page_size)
+
+    def iter_sensors_created_since(self, since, page_size):
+        """Yield readings stored at or after a timestamp, in the order they were stored"""
+        query = self.client.table('sensor_data').select('*').gte('created_at', since).order('created_at', desc=False).order('id', desc=False)
+        return self._pages('sensor_data', 'iter_sensors_created_since', query, page_size)
+
+    # Health checks
+    def ping(self):
+        """Cheapest round trip that proves the database answers"""
+        self._execute('inventory_item', 'ping', self.client.table('inventory_item').select('id').limit(1))
+
+    def latest_reading_times(self, since, limit=5000):
+        """Timestamp of the newest reading per device, from the newest `limit` rows since a time"""
+        query = self.client.table('sensor_data').select('device_id,timestamp').gte('timestamp', since).order('timestamp', desc=True).limit(limit)
+        latest = {}
+        for row in self._execute('sensor_data', 'latest_reading_times', query).data:
+            latest.setdefault(row['device_id'], row['timestamp'])
+        return latest
+
+    def _execute(self, table, operation, query):
+        """Run a query, recording its duration and failures per table"""
+        start = time.perf_counter()
+        try:
+            with tracing.span(f'storage.{operation}', table=table):
+                timeout = CALL_TIMEOUT.get()
+                if timeout is None or timeout >= self.timeout:
+                    return query.execute()
+                return self._execute_within(query, timeout)
+        except Exception:
+            STORAGE_ERRORS.labels(table, operation).inc()
+            raise
+        finally:
+            STORAGE_LATENCY.labels(table, operation).observe(time.perf_counter() - start)
+
+    def _execute_within(self, query, timeout):
+        """Run a query but stop waiting after `timeout` seconds
+
+        The client's timeout is fixed when it is created, so a caller with
+        less time left waits on a helper thread instead; the abandoned
+        request still ends at the client's own timeout.
+        """
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._executor_pid != pid:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='supabase-call')
+                self._executor_pid = pid
+        future = self._executor.submit(handed_off(query.execute))
+        try:
+            return future.result(timeout=max(timeout, 0.001))
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError(f"Storage call exceeded the {timeout:.2f}s left before the deadline") from None
+
+    def _pages(self, table, operation, query, page_size):
+        # PostgREST caps each response, so walk the result with ranges
+        start = 0
+        while True:
+            rows = self._execute(table, operation, query.range(start, start + page_size - 1)).data
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            start += page_size
+
+
+class PostgresStorage:
+    """The same operations as SupabaseStorage, run directly against Postgres
+
+    Each process keeps its own pool of connections; fixed-shape queries are
+    prepared once per connection and bulk sensor inserts use COPY. Rows come
+    back shaped like the REST API's, with timestamps as ISO strings.
+    """
+
+    # name: (parameter types, statement); executed with EXECUTE after the first PREPARE
+    STATEMENTS = {
+        'list_items': ('', 'SELECT * FROM inventory_item ORDER BY added_date DESC'),
+        'list_unspoiled_items': ('', 'SELECT * FROM inventory_item WHERE is_spoiled = FALSE'),
+        'delete_item': ('(bigint)', 'DELETE FROM inventory_item WHERE id = $1'),
+        'mark_spoiled': ('(bigint[])', 'UPDATE inventory_item SET is_spoiled = TRUE WHERE id = ANY($1) RETURNING *'),
+        'latest_sensor': ('(timestamptz)', 'SELECT * FROM sensor_data WHERE timestamp >= $1 ORDER BY timestamp DESC LIMIT 1'),
+        'sensor_history': ('(timestamptz)', 'SELECT * FROM sensor_data WHERE timestamp >= $1 ORDER BY timestamp'),
+        'sensor_anomalies': ('(timestamptz, integer, text)',
+                             'SELECT * FROM sensor_data WHERE is_anomaly AND timestamp >= $1 '
+                             'AND ($3::text IS NULL OR device_id = $3) ORDER BY timestamp DESC LIMIT $2'),
+        'door_events': ('(timestamptz, text)',
+                        f"SELECT {DOOR_EVENT_COLUMNS} FROM door_event WHERE occurred_at >= $1 "
+                        "AND ($2::text IS NULL OR device_id = $2) ORDER BY occurred_at"),
+        'door_state_before': ('(timestamptz, text)',
+                              f"SELECT {DOOR_EVENT_COLUMNS} FROM door_event WHERE occurred_at < $1 "
+                              "AND ($2::text IS NULL OR device_id = $2) ORDER BY occurred_at DESC LIMIT 1"),
+        'ping': ('', 'SELECT 1'),
+        'latest_reading_times': ('(timestamptz)',
+                                 'SELECT DISTINCT ON (device_id) device_id, timestamp FROM sensor_data '
+                                 'WHERE timestamp >= $1 ORDER BY device_id, timestamp DESC')
+    }
+
+    def __init__(self, dsn, min_connections=1, max_connections=5, timeout=5):
+        self.dsn = dsn
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._pool = None
+        self._pool_pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        """Connection pool owned by the current process, created on first use"""
+        pid = os.getpid()
+        if self._pool is None or self._pool_pid != pid:
+            with self._lock:
+                if self._pool is None or self._pool_pid != pid:
+                    import psycopg2.extensions
+                    import psycopg2.pool
+
+                    class Connection(psycopg2.extensions.connection):
+                        """Remembers which statements it has prepared"""
+                        def __init__(self, *args, **kwargs):
+                            super().__init__(*args, **kwargs)
+                            self.prepared = set()
+
+                    self._pool = psycopg2.pool.ThreadedConnectionPool(
+                        self.min_connections, self.max_connections, self.dsn,
+                        connection_factory=Connection,
+                        connect_timeout=max(1, int(self.timeout)),
+                        options=f"-c statement_timeout={int(self.timeout * 1000)} -c timezone=UTC"
+                    )
+                    # The pool raises when exhausted; make callers wait for a connection instead
+                    self._slots = threading.BoundedSemaphore(self.max_connections)
+                    self._pool_pid = pid
+        return self._pool
+
+    def reset(self):
+        """Close every connection so the next call opens new ones"""
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.closeall()
+            self._pool = None
+            self._pool_pid = None
+
+    @contextlib.contextmanager
+    def _connection(self):
+        pool = self.pool
+        timeout = CALL_TIMEOUT.get()
+        if timeout is None or timeout >= self.timeout:
+            timeout = None
+        if not self._slots.acquire(timeout=self.timeout if timeout is None else max(timeout, 0.001)):
+            raise TimeoutError('No database connection free')
+        try:
+            conn = pool.getconn()
+        except BaseException:
+            self._slots.release()
+            raise
+        try:
+            if timeout is not None:
+                # Shorter than the connection's statement_timeout; ends with the transaction
+                with conn.cursor() as cur:
+                    cur.execute('SET LOCAL statement_timeout = %s', (max(1, int(timeout * 1000)),))
+            yield conn
+            conn.commit()
+        except BaseException:
+            broken = conn.closed
+            if not broken:
+                conn.rollback()
+            pool.putconn(conn, close=bool(broken))
+            self._slots.release()
+            raise
+        pool.putconn(conn)
+        self._slots.release()
+
+    def _run(self, table, operation, func):
+        """Call func(connection), recording its duration and failures per table"""
+        start = time.perf_counter()
+        try:
+            with tracing.span(f'storage.{operation}', table=table), self._connection() as conn:
+                return func(conn)
+        except Exception:
+            STORAGE_ERRORS.labels(table, operation).inc()
+            raise
+        finally:
+            STORAGE_LATENCY.labels(table, operation).observe(time.perf_counter() - start)
+
+    def _prepared(self, table, name, *params):
+        """Rows of a named statement, preparing it on this connection first if needed"""
+        def run(conn):
+            with conn.cursor() as cur:
+                if name not in conn.prepared:
+                    types, statement = self.STATEMENTS[name]
+                    cur.execute(f"PREPARE {name} {types} AS {statement}")
+                    conn.prepared.add(name)
+                placeholders = ', '.join(['%s'] * len(params))
+                cur.execute(f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}", params)
+                return _fetch_rows(cur)
+        return self._run(table, name, run)
+
+    def _statement(self, table, operation, statement, params=()):
+        """Rows of a one-off statement whose shape depends on the data"""
+        def run(conn):
+            with conn.cursor() as cur:
+                cur.execute(statement, params)
+                return _fetch_rows(cur)
+        return self._run(table, operation, run)
+
+    def _insert(self, table, operation, rows, skip_conflicts_on=None):
+        from psycopg2 import sql
+        columns = list(rows[0])
+        statement = sql.SQL('INSERT INTO {} ({}) VALUES {} {} RETURNING *').format(
+            sql.Identifier(table),
+            sql.SQL(', ').join(map(sql.Identifier, columns)),
+            sql.SQL(', ').join(sql.SQL('({})').format(sql.SQL(', ').join(sql.Placeholder() * len(columns))) for _ in rows),
+            sql.SQL('ON CONFLICT ({}) DO NOTHING').format(sql.Identifier(skip_conflicts_on)) if skip_conflicts_on else sql.SQL('')
+        )
+        params = [_adapt(row.get(column)) for row in rows for column in columns]
+        return self._statement(table, operation, statement, params)
+
+    def _stream(self, table, operation, statement, params, page_size):
+        # A server-side cursor holds one connection until the last page is read
+        with self._connection() as conn, conn.cursor(name=f"{operation}_cursor") as cur:
+            cur.itersize = page_size
+            start = time.perf_counter()
+            try:
+                cur.execute(statement, params)
+            finally:
+                STORAGE_LATENCY.labels(table, operation).observe(time.perf_counter() - start)
+            while True:
+                rows = _fetch_rows(cur, page_size)
+                if rows:
+                    yield rows
+                if len(rows) < page_size:
+                    return
+
+    # Inventory items
+    def list_items(self):
+        return self._prepared('inventory_item', 'list_items')
+
+    def iter_items(self, page_size):
+        """Yield API-shaped inventory rows one page at a time, newest first"""
+        return self._stream('inventory_item', 'iter_items',
+                            f"SELECT {ITEM_COLUMNS} FROM inventory_item ORDER BY added_date DESC, id DESC", (), page_size)
+
+    def list_unspoiled_items(self):
+        return self._prepared('inventory_item', 'list_unspoiled_items')
+
+    def insert_item(self, item_data):
+        rows = self._insert('inventory_item', 'insert_item', [item_data])
+        return rows[0] if rows else None
+
+    def insert_items(self, rows):
+        """Insert many items in one statement; rows whose client_key is already stored are skipped"""
+        if not rows:
+            return []
+        return self._insert('inventory_item', 'insert_items', rows, skip_conflicts_on='client_key')
+
+    def update_item(self, item_id, update_data):
+        from psycopg2 import sql
+        statement = sql.SQL('UPDATE inventory_item SET {} WHERE id = %s RETURNING *').format(
+            sql.SQL(', ').join(sql.SQL('{} = %s').format(sql.Identifier(column)) for column in update_data)
+        )
+        rows = self._statement('inventory_item', 'update_item', statement,
+                               [_adapt(value) for value in update_data.values()] + [item_id])
+        return rows[0] if rows else None
+
+    def delete_item(self, item_id):
+        self._prepared('inventory_item', 'delete_item', item_id)
+
+    def mark_spoiled(self, item_ids):
+        """Flag several items as spoiled in a single round trip"""
+        if not item_ids:
+            return []
+        return self._prepared('inventory_item', 'mark_spoiled', list(item_ids))
+
+    # Sensor readings
+    def latest_sensor(self, since):
+        rows = self._prepared('sensor_data', 'latest_sensor', since)
+        return rows[0] if rows else None
+
+    def insert_sensor(self, sensor_data):
+        rows = self._insert('sensor_data', 'insert_sensor', [sensor_data])
+        return rows[0] if rows else None
+
+    def insert_sensors(self, rows):
+        """Insert many readings with one COPY per set of columns, in one transaction"""
+        if not rows:
+            return
+        # Columns a row leaves out keep their defaults instead of becoming NULL
+        shapes = {}
+        for row in rows:
+            shapes.setdefault(tuple(sorted(row)), []).append(row)
+
+        def copy(conn):
+            with conn.cursor() as cur:
+                for columns, shape_rows in shapes.items():
+                    buffer = io.StringIO()
+                    for row in shape_rows:
+                        buffer.write('\t'.join(_copy_value(row[column]) for column in columns))
+                        buffer.write('\n')
+                    buffer.seek(0)
+                    cur.copy_expert(f"COPY sensor_data ({', '.join(columns)}) FROM STDIN", buffer)
+        self._run('sensor_data', 'insert_sensors', copy)
+
+    def sensor_history(self, since):
+        return self._prepared('sensor_data', 'sensor_history', since)
+
+    def iter_sensor_history(self, since, page_size):
+        """Yield API-shaped sensor rows since a timestamp one page at a time"""
+        return self._stream('sensor_data', 'iter_sensor_history',
+                            f"SELECT {SENSOR_COLUMNS} FROM sensor_data WHERE timestamp >= %s ORDER BY timestamp, id",
+                            (since,), page_size)
+
+    def sensor_anomalies(self, since, limit, device_id=None):
+        return self._prepared('sensor_data', 'sensor_anomalies', since, limit, device_id)
+
+    # Door events
+    def insert_door_events(self, events):
+        return self._insert('door_event', 'insert_door_events', events) if events else []
+
+    def door_events(self, since, device_id=None):
+        """Open/close edges since a timestamp, oldest first"""
+        return self._prepared('door_event', 'door_events', since, device_id)
+
+    def door_state_before(self, before, device_id=None):
+        """Last edge before a timestamp, for doors already open when a window starts"""
+        rows = self._prepared('door_event', 'door_state_before', before, device_id)
+        return rows[0] if rows else None
+
+    # Change feeds for the local mirror
+    def iter_items_changed_since(self, since, page_size):
+        """Yield items updated at or after a timestamp, oldest change first"""
+        return self._stream('inventory_item', 'iter_items_changed_since',
+                            'SELECT * FROM inventory_item WHERE updated_at >= %s ORDER BY updated_at, id', (since,), page_size)
+
+    def iter_item_ids(self, page_size):
+        """Yield pages of {'id': ...} for every item, to find deleted ones"""
+        return self._stream('inventory_item', 'iter_item_ids', 'SELECT id FROM inventory_item ORDER BY id', (), page_size)
+
+    def iter_sensors_created_since(self, since, page_size):
+        """Yield readings stored at or after a timestamp, in the order they were stored"""
+        return self._stream('sensor_data', 'iter_sensors_created_since',
+                            'SELECT * FROM sensor_data WHERE created_at >= %s ORDER BY created_at, id', (since,), page_size)
+
+    # Health checks
+    def ping(self):
+        """Cheapest round trip that proves the database answers"""
+        self._prepared('inventory_item', 'ping')
+
+    def latest_reading_times(self, since, limit=None):
+        """Timestamp of the newest reading per device since a time"""
+        return {row['device_id']: row['timestamp'] for row in self._prepared('sensor_data', 'latest_reading_times', since)}
+
+
+def _adapt(value):
+    """Parameter value for psycopg2, with dicts and lists sent as JSONB"""
+    if isinstance(value, (dict, list)):
+        from psycopg2.extras import Json
+        return Json(value)
+    return value
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _fetch_rows(cur, size=None):
+    """Rows as dicts of JSON-ready values, or [] for statements without results"""
+    if size is not None:
+        # A server-side cursor only has a description after its first fetch
+        rows = cur.fetchmany(size)
+    elif cur.description is None:
+        return []
+    else:
+        rows = cur.fetchall()
+    names = [column.name for column in cur.description]
+    return [{name: _json_value(value) for name, value in zip(names, row)} for row in rows]
+
+
+def _copy_value(value):
+    """One field of COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+class StorageUnavailable(Exception):
+    """Storage failed or is shedding load and there is no earlier result to serve"""
+
+
+class CircuitBreaker:
+    """Reject calls for a while after repeated consecutive failures
+
+    After `reset_timeout` seconds one trial call is let through; its outcome
+    closes the circuit again or restarts the wait.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+        BREAKER_OPEN.set_function(lambda: 1 if self.opened_at is not None else 0)
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release_trial(self):
+        """End a trial call whose outcome says nothing about storage health"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class ResilientStorage:
+    """Storage view that bounds how long a call may block a request thread
+
+    Every call goes through a circuit breaker. Reads are retried with
+    jittered exponential backoff within an overall deadline, which each
+    attempt receives as its timeout, and when they still fail the last good result of the same call is returned instead,
+    reported through `on_stale(fetched_at)`. Only the `max_last_good` most
+    recently used results are kept. Writes are not retried.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, storage, breaker=None, deadline=5.0, attempt_timeout=2.0, retries=2,
+                 backoff=0.2, on_stale=None, max_last_good=256):
+        self.storage = storage
+        self.breaker = breaker or CircuitBreaker()
+        self.deadline = deadline
+        # Per-attempt HTTP timeout of the wrapped client, used to decide
+        # whether another attempt still fits before the deadline
+        self.attempt_timeout = attempt_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.on_stale = on_stale
+        self.max_last_good = max_last_good
+        self._last_good = OrderedDict()
+        self._last_good_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        operation = getattr(self.storage, name)
+        if name in READ_OPERATIONS:
+            return functools.partial(self._read, name, operation)
+        if name in WRITE_OPERATIONS:
+            return functools.partial(self._write, operation)
+        if name in STREAM_OPERATIONS:
+            return functools.partial(self._stream, operation)
+        return operation
+
+    def _call(self, operation, args, kwargs, timeout):
+        if not self.breaker.allow():
+            raise StorageUnavailable('Storage circuit is open')
+        token = CALL_TIMEOUT.set(timeout)
+        try:
+            result = operation(*args, **kwargs)
+        except Exception as e:
+            if is_outage(e):
+                self.breaker.record_failure()
+            else:
+                # Storage answered; a bad request is not a reason to open the circuit
+                self.breaker.release_trial()
+            raise
+        finally:
+            CALL_TIMEOUT.reset(token)
+        self.breaker.record_success()
+        return result
+
+    def _read(self, name, operation, *args, **kwargs):
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                result = self._call(operation, args, kwargs, self.deadline - (time.monotonic() - start))
+                self._remember(_result_key(name, args, kwargs), result)
+                return result
+            except StorageUnavailable as e:
+                return self._fallback(name, args, kwargs, e)
+            except Exception as e:
+                if not is_outage(e):
+                    raise
+                attempt += 1
+                # Full jitter keeps retrying workers from hitting Supabase in step
+                delay = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+                remaining = self.deadline - (time.monotonic() - start)
+                if attempt > self.retries or delay + self.attempt_timeout > remaining:
+                    return self._fallback(name, args, kwargs, e)
+                STORAGE_RETRIES.labels(name).inc()
+                time.sleep(delay)
+
+    def _remember(self, key, result):
+        with self._last_good_lock:
+            self._last_good[key] = (result, datetime.utcnow())
+            self._last_good.move_to_end(key)
+            while len(self._last_good) > self.max_last_good:
+                self._last_good.popitem(last=False)
+
+    def _fallback(self, name, args, kwargs, error):
+        key = _result_key(name, args, kwargs)
+        with self._last_good_lock:
+            result, fetched_at = self._last_good.get(key, (self._MISSING, None))
+            if result is not self._MISSING:
+                self._last_good.move_to_end(key)
+        if result is self._MISSING:
+            raise StorageUnavailable(str(error)) from error
+        STALE_READS.labels(name).inc()
+        if self.on_stale:
+            self.on_stale(fetched_at)
+        return result
+
+    def _write(self, operation, *args, **kwargs):
+        return self._call(operation, args, kwargs, self.deadline)
+
+    def _stream(self, operation, *args, **kwargs):
+        # Pages are fetched while the response streams, so only fail fast here
+        if self.breaker.state == 'open':
+            raise StorageUnavailable('Storage circuit is open')
+        return operation(*args, **kwargs)
+
+
+def _result_key(name, args, kwargs):
+    """Key of a read's last good result: the operation and its arguments
+
+    Window bounds such as `since` move with every request, so timestamps are
+    left out; everything else, like device IDs and limits, must match.
+    """
+    def normalize(value):
+        if isinstance(value, (datetime, date)):
+            return None
+        if isinstance(value, str):
+            try:
+                datetime.fromisoformat(value.replace('Z', '+00:00'))
+                return None
+            except ValueError:
+                pass
+        return value
+    return (name, tuple(normalize(arg) for arg in args),
+            tuple(sorted((key, normalize(value)) for key, value in kwargs.items())))
+
+
+class AsyncStorage:
+    """Awaitable view of a storage backend for async request handlers
+
+    Each operation runs the blocking call in a worker thread, so handlers can
+    gather independent queries and wait only as long as the slowest one.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __getattr__(self, name):
+        operation = getattr(self.storage, name)
+        if not callable(operation):
+            return operation
+
+        @functools.wraps(operation)
+        async def run(*args, **kwargs):
+            return await asyncio.to_thread(operation, *args, **kwargs)
+
+        return run
@@ -0,0 +1,242 @@
+"""
+Process supervisor for Freezer Inventory System
+Starts the app under gunicorn and the sensor daemon in order, waiting for
+each to report ready, drains their output into size-rotated log files, and
+restarts a child that exits, fails its HTTP health probe or stops refreshing
+its watchdog file, backing off exponentially when it keeps failing
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+
+def gunicorn_command(app_dir):
+    """argv serving wsgi:app from app_dir with gunicorn.conf.py, i.e. the production configuration"""
+    return [sys.executable, '-m', 'gunicorn', '--chdir', app_dir,
+            '-c', os.path.join(app_dir, 'gunicorn.conf.py'), 'wsgi:app']
+
+
+def http_ok(url, timeout=2.0):
+    """True when a GET of the URL answers 2xx within the timeout"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return 200 <= response.status < 300
+    except Exception:
+        return False
+
+
+def write_watchdog(path, next_within):
+    """Tell the supervisor this process is alive and will check in again within `next_within` seconds"""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'pid': os.getpid(), 'at': time.time(), 'next_by': time.time() + next_within}, f)
+    os.replace(tmp, path)
+
+
+def watchdog_expired(path, grace, missing_ok=False):
+    """True when the watchdog file says its writer is overdue by more than `grace` seconds"""
+    try:
+        with open(path) as f:
+            next_by = json.load(f)['next_by']
+    except (OSError, ValueError, KeyError):
+        return not missing_ok
+    return time.time() > next_by + grace
+
+
+class ManagedProcess:
+    """One supervised child process and its restart policy"""
+
+    def __init__(self, name, argv, log_file=None, health_url=None, ready_url=None, ready_timeout=60.0,
+                 watchdog_file=None, watchdog_grace=30.0, health_interval=10.0, health_failures=3,
+                 min_backoff=1.0, max_backoff=300.0, stable_after=60.0, max_bytes=1048576, backup_count=5):
+        self.name = name
+        self.argv = argv
+        self.health_url = health_url
+        self.ready_url = ready_url or health_url
+        self.ready_timeout = ready_timeout
+        self.watchdog_file = watchdog_file
+        self.watchdog_grace = watchdog_grace
+        self.health_interval = health_interval
+        self.health_failures = health_failures
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        # A child that stays up this long has its backoff reset
+        self.stable_after = stable_after
+        self.process = None
+        self.started_at = None
+        self.restarts = 0
+        self.next_start = 0.0
+        self._failed_probes = 0
+        self._last_probe = 0.0
+        self._consecutive_failures = 0
+        self._log = self._child_logger(log_file, max_bytes, backup_count)
+
+    def _child_logger(self, log_file, max_bytes, backup_count):
+        child_logger = logging.getLogger(f"supervisor.child.{self.name}")
+        child_logger.propagate = False
+        child_logger.setLevel(logging.INFO)
+        if log_file and not child_logger.handlers:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            child_logger.addHandler(handler)
+        return child_logger
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.watchdog_file:
+            try:
+                os.remove(self.watchdog_file)
+            except FileNotFoundError:
+                pass
+        logger.info(f"Starting {self.name}: {' '.join(self.argv)}")
+        self.process = subprocess.Popen(self.argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        stdin=subprocess.DEVNULL, start_new_session=True)
+        self.started_at = time.monotonic()
+        self._failed_probes = 0
+        self._last_probe = self.started_at
+        threading.Thread(target=self._drain, args=(self.process,), name=f"drain-{self.name}", daemon=True).start()
+
+    def _drain(self, process):
+        # Read continuously so a chatty child never blocks on a full pipe
+        for line in iter(process.stdout.readline, b''):
+            text = line.decode('utf-8', 'replace').rstrip('\n')
+            if self._log.handlers:
+                self._log.info(text)
+            else:
+                print(f"[{self.name}] {text}", flush=True)
+        process.stdout.close()
+
+    def wait_ready(self):
+        """Block until the ready URL answers, the child exits or the timeout passes"""
+        if not self.ready_url:
+            return self.running
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline:
+            if not self.running:
+                return False
+            if http_ok(self.ready_url):
+                logger.info(f"{self.name} ready after {time.monotonic() - self.started_at:.1f}s")
+                return True
+            time.sleep(0.5)
+        logger.warning(f"{self.name} not ready after {self.ready_timeout:.0f}s")
+        return False
+
+    def stop(self, timeout=10.0):
+        if not self.running:
+            return
+        logger.info(f"Stopping {self.name}")
+        # Signal the whole session, so reloader and worker children go too
+        self._signal_group(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"{self.name} did not exit after {timeout:.0f}s, killing it")
+            self._signal_group(signal.SIGKILL)
+            self.process.wait()
+
+    def _signal_group(self, signum):
+        try:
+            os.killpg(self.process.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def problem(self):
+        """Why the child needs restarting, or None while it is healthy"""
+        if self.process is None:
+            return 'not started'
+        code = self.process.poll()
+        if code is not None:
+            return f"exited with code {code}"
+        now = time.monotonic()
+        if self.watchdog_file:
+            # A child that is still starting up may not have written the file yet
+            starting = now - self.started_at < self.ready_timeout
+            if watchdog_expired(self.watchdog_file, self.watchdog_grace, missing_ok=starting):
+                return 'watchdog expired'
+        if self.health_url and now - self._last_probe >= self.health_interval:
+            self._last_probe = now
+            if http_ok(self.health_url):
+                self._failed_probes = 0
+            else:
+                self._failed_probes += 1
+                if self._failed_probes >= self.health_failures:
+                    return f"failed {self._failed_probes} health probes"
+        return None
+
+    def schedule_restart(self):
+        """Pick when to start again, doubling the wait while the child keeps failing"""
+        if self.started_at is not None and time.monotonic() - self.started_at >= self.stable_after:
+            self._consecutive_failures = 0
+        delay = min(self.max_backoff, self.min_backoff * 2 ** self._consecutive_failures)
+        self._consecutive_failures += 1
+        self.next_start = time.monotonic() + delay
+        return delay
+
+
+class Supervisor:
+    """Runs ManagedProcesses in order and keeps them running until stopped"""
+
+    def __init__(self, processes, check_interval=1.0):
+        self.processes = processes
+        self.check_interval = check_interval
+        self._stop = threading.Event()
+
+    def start_all(self):
+        """Start each child and wait for it to be ready before the next"""
+        for child in self.processes:
+            child.start()
+            if not child.wait_ready():
+                logger.warning(f"{child.name} did not become ready; continuing and supervising it")
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._handle_signal)
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        try:
+            self.start_all()
+            while not self._stop.wait(self.check_interval):
+                self.check()
+        finally:
+            self.stop_all()
+
+    def check(self):
+        now = time.monotonic()
+        for child in self.processes:
+            if child.process is None or child.next_start:
+                if now >= child.next_start:
+                    child.next_start = 0.0
+                    child.restarts += 1
+                    child.start()
+                continue
+            problem = child.problem()
+            if problem:
+                child.stop()
+                delay = child.schedule_restart()
+                logger.warning(f"{child.name} {problem}; restarting in {delay:.1f}s")
+
+    def stop(self):
+        self._stop.set()
+
+    def stop_all(self):
+        # Reverse start order, so the sensor daemon stops before the app it posts to
+        for child in reversed(self.processes):
+            child.stop()
+
+    def _handle_signal(self, signum, frame):
+        logger.info(f"Received signal {signum}, shutting down")
+        self.stop()
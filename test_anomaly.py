@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Anomaly detection tests for Freezer Inventory System
+Run with: python -m pytest test_anomaly.py
+"""
+
+from datetime import datetime, timedelta
+from anomaly import AnomalyDetector
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def feed(detector, device_id, values, metric='co2_ppm', start=START, step=60):
+    """Score one reading per value, `step` seconds apart; returns the flags of each"""
+    return [detector.score(device_id, {metric: value}, start + timedelta(seconds=step * n))
+            for n, value in enumerate(values)]
+
+
+def z_flagged(flags):
+    return any('z_score' in flag['reasons'] for flag in flags)
+
+
+def test_no_flags_during_warmup():
+    detector = AnomalyDetector(warmup=10)
+    flags = feed(detector, 'A', [400] * 5 + [5000])
+    assert not any(flags)
+
+
+def test_z_score_threshold_after_warmup():
+    detector = AnomalyDetector(warmup=10, z_threshold=4.0)
+    feed(detector, 'A', [400, 410] * 10)
+    baseline = detector.baselines('A')['A']['co2_ppm']
+    assert baseline['count'] == 20
+    # Constant-ish readings: the floor of 5 ppm keeps small moves unflagged
+    assert not z_flagged(detector.score('A', {'co2_ppm': 412}, START + timedelta(minutes=30)))
+    flags = detector.score('A', {'co2_ppm': 600}, START + timedelta(minutes=31))
+    assert z_flagged(flags)
+    assert flags[0]['z_score'] > 4.0
+
+
+def test_constant_warmup_still_flags_a_spike():
+    detector = AnomalyDetector(warmup=10)
+    feed(detector, 'A', [0.0] * 12, metric='ammonia_ppm')
+    assert z_flagged(detector.score('A', {'ammonia_ppm': 5.0}, START + timedelta(minutes=20)))
+
+
+def test_baselines_are_kept_per_device():
+    detector = AnomalyDetector(warmup=10)
+    feed(detector, 'A', [400, 410] * 10)
+    feed(detector, 'B', [1500, 1510] * 10)
+    assert z_flagged(detector.score('A', {'co2_ppm': 1505}, START + timedelta(minutes=30)))
+    assert not z_flagged(detector.score('B', {'co2_ppm': 1505}, START + timedelta(minutes=30)))
+    assert set(detector.baselines()) == {'A', 'B'}
+    assert set(detector.baselines('B')) == {'B'}
+
+
+def test_workers_share_baselines_through_the_state_file(tmp_path):
+    path = str(tmp_path / 'anomaly.db')
+    first, second = AnomalyDetector(warmup=10, state_path=path), AnomalyDetector(warmup=10, state_path=path)
+    # Readings alternate between two worker processes
+    for n, value in enumerate([400, 410] * 10):
+        worker = first if n % 2 else second
+        worker.score('A', {'co2_ppm': value}, START + timedelta(minutes=n))
+    assert first.baselines('A')['A']['co2_ppm']['count'] == 20
+    assert z_flagged(second.score('A', {'co2_ppm': 600}, START + timedelta(minutes=30)))
+
+    # And a restarted worker picks them up
+    restarted = AnomalyDetector(warmup=10, state_path=path)
+    assert restarted.baselines() == first.baselines()
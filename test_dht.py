@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+DHT22 reader tests for Freezer Inventory System
+Run with: python -m pytest test_dht.py
+"""
+
+from dht_sensor import DhtReader
+
+
+class FakeDevice:
+    """Yields one result per read: a (temperature, humidity) pair or an exception"""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.current = None
+
+    @property
+    def temperature(self):
+        self.current = self.results.pop(0)
+        if isinstance(self.current, Exception):
+            raise self.current
+        return self.current[0]
+
+    @property
+    def humidity(self):
+        return self.current[1]
+
+
+def reader_with(results, monkeypatch, max_age=60.0):
+    clock = [100.0]
+    monkeypatch.setattr('dht_sensor.time.monotonic', lambda: clock[0])
+    reader = DhtReader(4, max_age=max_age)
+    reader._device = FakeDevice(results)
+    return reader, clock
+
+
+def test_failed_reads_keep_the_last_good_value(monkeypatch):
+    reader, clock = reader_with([(-18.04, 41.26), RuntimeError('Checksum did not validate'), (None, 40.0)],
+                                monkeypatch)
+    assert reader.latest() == (None, None, None)
+    for _ in range(3):
+        reader.read_once()
+        clock[0] += 3
+    assert reader.latest() == (-18.0, 41.3, 9.0)
+
+
+def test_stale_value_is_not_reported(monkeypatch):
+    reader, clock = reader_with([(-18.0, 40.0)], monkeypatch, max_age=60.0)
+    reader.read_once()
+    clock[0] += 61
+    assert reader.latest() == (None, None, 61.0)
+
+
+def test_poll_interval_respects_the_sensor_minimum():
+    assert DhtReader(4, poll_interval=0.5).poll_interval == 2.0
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Door event tests for Freezer Inventory System
+Run with: python -m pytest test_door_events.py
+"""
+
+from datetime import datetime, timedelta
+from door_events import open_intervals, daily_stats
+
+DAY = datetime(2026, 3, 1)
+
+
+def at(hours, minutes=0):
+    return DAY + timedelta(hours=hours, minutes=minutes)
+
+
+def test_open_intervals_pairs_edges_and_ignores_repeats():
+    events = [(at(8), 'open'), (at(8, 1), 'open'), (at(8, 2), 'closed'), (at(9), 'closed'),
+              (at(10), 'open'), (at(10, 5), 'closed')]
+    assert open_intervals(events, DAY, at(24)) == [(at(8), at(8, 2), True), (at(10), at(10, 5), True)]
+
+
+def test_open_intervals_clips_to_the_window():
+    # Open when the window starts, and still open when it ends
+    events = [(at(1), 'closed'), (at(23), 'open'), (at(25), 'closed')]
+    assert open_intervals(events, DAY, at(24), open_at_start=True) == [
+        (DAY, at(1), False), (at(23), at(24), True)
+    ]
+
+
+def test_daily_stats_splits_an_opening_across_midnight():
+    intervals = [(at(-1), at(0, 30), False), (at(12), at(12, 1), True), (at(23, 50), at(24, 20), True)]
+    stats = daily_stats(intervals, DAY, 2)
+    assert stats == [
+        {'date': '2026-03-01', 'open_count': 2, 'open_seconds': 30 * 60 + 60 + 10 * 60},
+        {'date': '2026-03-02', 'open_count': 0, 'open_seconds': 20 * 60}
+    ]
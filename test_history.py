@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Sensor history tests for Freezer Inventory System
+Run with: python -m pytest test_history.py
+"""
+
+from datetime import datetime, timedelta
+from history import clamp_window, step_resample
+
+START = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def row(device_id, seconds, co2):
+    return {'device_id': device_id, 'timestamp': (START + timedelta(seconds=seconds)).isoformat(), 'co2_ppm': co2}
+
+
+def resample(rows, end_seconds, step, max_age=None):
+    pages = step_resample(rows, START, START + timedelta(seconds=end_seconds), step,
+                          datetime.fromisoformat, max_age=max_age)
+    return [(r['timestamp'][11:], r['device_id'], r['co2_ppm']) for page in pages for r in page]
+
+
+def test_step_resample_holds_the_last_reading_per_device():
+    rows = [row('a', -30, 400), row('b', 0, 900), row('a', 70, 450)]
+    assert resample(rows, 120, 60) == [
+        ('12:00:00', 'a', 400), ('12:00:00', 'b', 900),
+        ('12:01:00', 'a', 400), ('12:01:00', 'b', 900),
+        ('12:02:00', 'a', 450), ('12:02:00', 'b', 900)
+    ]
+
+
+def test_step_resample_keeps_the_original_time_and_drops_silent_devices():
+    rows = [row('a', 0, 400), row('b', 100, 900)]
+    pages = list(step_resample(rows, START, START + timedelta(seconds=120), 60, datetime.fromisoformat, max_age=90))
+    first = pages[0][0]
+    assert (first['timestamp'], first['observed_at']) == (START.isoformat(), rows[0]['timestamp'])
+    # Device a went quiet after its first reading
+    assert [(r['timestamp'][11:], r['device_id']) for page in pages for r in page] == [
+        ('12:00:00', 'a'), ('12:01:00', 'a'), ('12:02:00', 'b')
+    ]
+
+
+def test_clamp_window():
+    assert clamp_window(1000, None, max_hours=168, max_points=10000) == (168, None)
+    assert clamp_window(-5, -3, max_hours=168, max_points=10000) == (1, 1)
+    # A week in 10-second steps would be 60480 points per device
+    assert clamp_window(168, 10, max_hours=168, max_points=10000) == (168, 61)
+    assert clamp_window(24, 300, max_hours=168, max_points=10000) == (24, 300)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Ingest buffer tests for Freezer Inventory System
+Run with: python -m pytest test_ingest.py
+"""
+
+import pytest
+from ingest import IngestBuffer
+from local_queue import DurableQueue
+
+
+class RejectingWriter:
+    """Stores batches like a bulk insert: all or nothing, refusing text temperatures"""
+
+    def __init__(self):
+        self.stored = []
+        self.down = False
+
+    def __call__(self, rows):
+        if self.down:
+            raise ConnectionError('storage unreachable')
+        if any(isinstance(row.get('temperature'), str) for row in rows):
+            raise ValueError('invalid input syntax for type double precision')
+        self.stored.extend(rows)
+
+
+def buffer_for(tmp_path, writer, max_rows=10):
+    return IngestBuffer(DurableQueue(str(tmp_path / 'ingest.db')), writer, max_rows=max_rows)
+
+
+def test_rejected_reading_is_dead_lettered_and_the_rest_stored(tmp_path):
+    writer = RejectingWriter()
+    buffer = buffer_for(tmp_path, writer)
+    for n in range(6):
+        buffer.add({'n': n, 'temperature': 'warm' if n == 3 else -18.0})
+    buffer.flush()
+    assert [row['n'] for row in writer.stored] == [0, 1, 2, 4, 5]
+    assert len(buffer.queue) == 0
+    (_, payload, _, error), = buffer.queue.dead_letters()
+    assert payload['n'] == 3 and 'double precision' in error
+
+    # Later readings are no longer held up
+    buffer.add({'n': 6, 'temperature': -18.0})
+    buffer.flush()
+    assert writer.stored[-1]['n'] == 6
+
+
+def test_outage_keeps_the_batch_queued(tmp_path):
+    writer = RejectingWriter()
+    buffer = buffer_for(tmp_path, writer)
+    for n in range(3):
+        buffer.add({'n': n, 'temperature': -18.0})
+    writer.down = True
+    with pytest.raises(ConnectionError):
+        buffer.flush()
+    assert len(buffer.queue) == 3
+    assert buffer.queue.dead_letter_count() == 0
+
+    writer.down = False
+    buffer.flush()
+    assert [row['n'] for row in writer.stored] == [0, 1, 2]
+
+
+def test_sensor_data_error():
+    from app import sensor_data_error
+    reading = {'device_id': 'pi-kitchen', 'co2_ppm': 420, 'ammonia_ppm': 0.5, 'h2s_ppm': None,
+               'door_open': False, 'air_quality': 'good', 'ammonia_stats': {'max': 0.7}, 'h2s_stats': None,
+               'temperature': -18.5, 'humidity': 40}
+    assert sensor_data_error(reading) is None
+    assert 'temperature' in sensor_data_error(dict(reading, temperature='-18'))
+    assert 'co2_ppm' in sensor_data_error(dict(reading, co2_ppm=float('nan')))
+    assert 'humidity' in sensor_data_error(dict(reading, humidity=True))
+    assert 'air_quality' in sensor_data_error(dict(reading, air_quality='x' * 21))
+    assert 'device_id' in sensor_data_error(dict(reading, device_id='d' * 51))
+    assert 'door_open' in sensor_data_error(dict(reading, door_open='yes'))
+    assert 'ammonia_stats' in sensor_data_error(dict(reading, ammonia_stats=[1, 2]))
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span.to_dict())
+
+
+def test_batch_insert_is_traced_under_the_request_that_queued_it(tmp_path):
+    import tracing
+    writer = RejectingWriter()
+    exporter = ListExporter()
+    tracer = tracing.Tracer('flask', exporter)
+    buffer = IngestBuffer(DurableQueue(str(tmp_path / 'ingest.db')), writer, tracer=tracer)
+    with tracer.span('POST /api/sensors', trace_id='abc123') as request_span:
+        buffer.add({'n': 0, 'temperature': -18.0})
+    buffer.add({'n': 1, 'temperature': -18.0})
+    buffer.flush()
+
+    assert writer.stored == [{'n': 0, 'temperature': -18.0}, {'n': 1, 'temperature': -18.0}]
+    insert, = [span for span in exporter.spans if span['name'] == 'storage.insert_sensors']
+    assert (insert['trace_id'], insert['parent_id']) == ('abc123', request_span.span_id)
+    assert insert['attributes'] == {'batch_rows': 2} and insert['error'] is None
+
+
+def test_unlisted_devices_share_one_metrics_label():
+    from flask import Flask
+    from app import device_label
+    app = Flask(__name__)
+    app.config['METRICS_DEVICE_IDS'] = frozenset({'pi-kitchen'})
+    assert device_label(app, 'pi-kitchen') == 'pi-kitchen'
+    assert device_label(app, 'anything-a-client-posts') == 'other'
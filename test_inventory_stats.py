@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Inventory counter tests for Freezer Inventory System
+Run with: python -m pytest test_inventory_stats.py
+"""
+
+from datetime import datetime, timedelta
+from inventory_stats import InventoryStats
+
+TODAY = datetime.utcnow().date()
+
+
+def item(item_id, category='meat', spoiled=False, days=10):
+    return {'id': item_id, 'category': category, 'is_spoiled': spoiled,
+            'expiry_date': (TODAY + timedelta(days=days)).isoformat() + 'T00:00:00'}
+
+
+def test_writes_update_the_counters():
+    stats = InventoryStats()
+    stats.item_upserted(item(1, days=-1))
+    stats.item_upserted(item(2, category='vegetables', days=2))
+    stats.item_upserted(item(3, spoiled=True))
+    stats.item_upserted(item(3, category='fish', spoiled=True))
+    stats.item_removed(2)
+    snapshot = stats.snapshot(expiry_warning_days=3)
+    assert snapshot['total'] == 2
+    assert snapshot['by_category'] == {'meat': 1, 'fish': 1}
+    assert snapshot['by_status'] == {'fresh': 1, 'spoiled': 1}
+    assert (snapshot['expired'], snapshot['expiring_soon']) == (1, 0)
+
+
+def test_reconcile_reports_drift_and_keeps_writes_made_while_loading():
+    stats = InventoryStats()
+    stats.item_upserted(item(1))
+    stats.item_upserted(item(2))
+
+    def load_items():
+        # Written after the database was read, so missing from the list
+        stats.item_upserted(item(4, category='fish'))
+        stats.item_removed(1)
+        return [item(1), item(2), item(3, category='bread')]
+
+    # Item 3 was never counted: one category, one status and one expiry day off
+    assert stats.reconcile(load_items) == 3
+    assert stats.snapshot()['by_category'] == {'meat': 1, 'bread': 1, 'fish': 1}
+    assert stats.last_reconciled is not None
+    assert stats.reconcile(lambda: [item(2), item(3, category='bread'), item(4, category='fish')]) == 0
+
+
+def test_workers_sharing_a_state_file_see_each_others_writes(tmp_path):
+    path = str(tmp_path / 'stats.db')
+    worker_a, worker_b = InventoryStats(path), InventoryStats(path)
+    worker_a.item_upserted(item(1))
+    assert worker_b.snapshot()['total'] == 1
+    worker_b.item_removed(1)
+    assert worker_a.snapshot()['total'] == 0
+
+    # Only one worker reconciles at a time
+    def load_items():
+        assert worker_b.reconcile(lambda: []) is None
+        return [item(5)]
+    assert worker_a.reconcile(load_items) == 3
+    assert worker_b.snapshot()['total'] == 1
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Mutation log tests for Freezer Inventory System
+Run with: python -m pytest test_mutations.py
+"""
+
+import pytest
+from local_queue import DurableQueue
+from mutations import MutationLog
+
+
+class FakeStorage:
+    """In-memory items; refuses items named 'bad' the way a check constraint would"""
+
+    def __init__(self):
+        self.items = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError('storage unreachable')
+
+    def insert_items(self, rows):
+        self._check()
+        if any(row['name'] == 'bad' for row in rows):
+            raise ValueError('new row violates check constraint')
+        stored = []
+        for row in rows:
+            item = dict(row, id=len(self.items) + 1)
+            self.items[item['id']] = item
+            stored.append(item)
+        return stored
+
+    def update_item(self, item_id, data):
+        self._check()
+        if item_id not in self.items:
+            return None
+        self.items[item_id].update(data)
+        return self.items[item_id]
+
+    def delete_item(self, item_id):
+        self._check()
+        self.items.pop(item_id, None)
+
+
+def log_for(tmp_path, storage):
+    return MutationLog(DurableQueue(str(tmp_path / 'mutations.db')), storage)
+
+
+def test_refused_entry_is_set_aside_and_replay_continues(tmp_path):
+    storage = FakeStorage()
+    log = log_for(tmp_path, storage)
+    storage.down = True
+    for name in ('peas', 'bad', 'corn'):
+        entry, _ = log.submit('insert', data={'name': name})
+        assert entry is not None
+    storage.down = False
+    log.replay()
+
+    assert sorted(item['name'] for item in storage.items.values()) == ['corn', 'peas']
+    status = log.status()
+    assert status['pending'] == 0
+    assert status['failed'] == 1
+    assert status['failed_mutations'][0]['name'] == 'bad'
+    assert 'check constraint' in status['failed_mutations'][0]['error']
+
+    # New writes go straight through instead of queueing behind the refused one
+    entry, row = log.submit('insert', data={'name': 'beans'})
+    assert entry is None and row['name'] == 'beans'
+
+
+def test_outage_keeps_entries_in_order(tmp_path):
+    storage = FakeStorage()
+    log = log_for(tmp_path, storage)
+    storage.down = True
+    log.submit('insert', data={'name': 'peas'})
+    log.submit('update', item_id=1, data={'quantity': 3})
+    with pytest.raises(ConnectionError):
+        log.replay()
+    assert log.status()['pending'] == 2
+
+    storage.down = False
+    log.replay()
+    assert storage.items[1]['quantity'] == 3
+    assert log.status()['failed'] == 0
+
+
+def test_status_lists_only_the_oldest_entries(tmp_path):
+    storage = FakeStorage()
+    storage.down = True
+    log = log_for(tmp_path, storage)
+    for n in range(8):
+        log.submit('insert', data={'name': f'item {n}', 'qr_code': 'x' * 1000})
+    status = log.status(limit=3)
+    assert status['pending'] == 8
+    assert [mutation['name'] for mutation in status['mutations']] == ['item 0', 'item 1', 'item 2']
+    assert 'qr_code' not in status['mutations'][0]
+    assert log.status(limit=0)['mutations'] == []
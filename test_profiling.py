@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Profiling tests for Freezer Inventory System
+Run with: python -m pytest test_profiling.py
+"""
+
+import threading
+import time
+from flask import Flask
+import profiling
+from profiling import StackSampler, authorized, handed_off
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_follows_its_thread_and_hand_offs_only():
+    sampler = StackSampler(200)
+    sampler.start()
+    token = profiling._active.set(sampler)
+    try:
+        stranger = threading.Thread(target=busy, args=(0.2,), name='other-request')
+        stranger.start()
+        helper = threading.Thread(target=handed_off(busy), args=(0.1,), name='supabase-call')
+        helper.start()
+        helper.join()
+        stranger.join()
+    finally:
+        profiling._active.reset(token)
+        sampler.stop()
+    roots = {stack.split(';', 1)[0] for stack in sampler.stacks}
+    assert 'supabase-call' in roots and threading.current_thread().name in roots
+    assert 'other-request' not in roots
+
+
+def test_token_is_only_accepted_in_the_header():
+    app = Flask(__name__)
+    app.config['PROFILE_TOKEN'] = 'secret'
+    with app.test_request_context('/api/profiles', headers={'X-Profile-Token': 'secret'}):
+        assert authorized(app)
+    with app.test_request_context('/api/profiles?profile_token=secret'):
+        assert not authorized(app)
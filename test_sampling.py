@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Sampling tests for Freezer Inventory System
+Run with: python -m pytest test_sampling.py
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+from adc_sampling import AdcSampler, RingBuffer, summarize
+from sensors import AdaptiveSampler, DeadbandFilter
+
+
+def sampler():
+    return AdcSampler({'ammonia_ppm': (None, None)}, rate_hz=10, window_seconds=10)
+
+
+def test_summaries_cover_the_interval_and_report_the_latest_median():
+    adc = sampler()
+    for value in (1.0, 9.0, 1.0):
+        adc.buffers['ammonia_ppm'].append(value)
+    stats, median = adc.summaries()['ammonia_ppm']
+    assert (stats['max'], stats['count'], median) == (9.0, 3, 1.0)
+
+    # A reading held back by the deadband keeps the spike in the next summary
+    for value in (2.0, 2.0):
+        adc.buffers['ammonia_ppm'].append(value)
+    stats, median = adc.summaries()['ammonia_ppm']
+    assert (stats['max'], stats['count'], median) == (9.0, 5, 2.0)
+
+    adc.commit()
+    adc.buffers['ammonia_ppm'].append(3.0)
+    stats, median = adc.summaries()['ammonia_ppm']
+    assert (stats['max'], stats['count'], median) == (3.0, 1, 3.0)
+    assert adc.summaries()['ammonia_ppm'] == (summarize(np.array([3.0])), None)
+
+
+def test_ring_buffer_keeps_the_newest_samples_in_order():
+    buffer = RingBuffer(3)
+    for value in range(5):
+        buffer.append(value)
+    assert buffer.values().tolist() == [2, 3, 4]
+    assert buffer.total == 5
+    buffer.clear()
+    assert buffer.values().tolist() == []
+
+
+def test_summarize():
+    assert summarize(np.array([])) is None
+    assert summarize(np.array([1.0, 2.0, 3.0, 10.0])) == {
+        'min': 1.0, 'max': 10.0, 'mean': 4.0, 'median': 2.5, 'stddev': 3.536, 'count': 4
+    }
+
+
+def reading(**values):
+    return dict({'door_open': False, 'air_quality': 'good', 'co2_ppm': 400, 'ammonia_ppm': 1.0,
+                 'ammonia_stats': None, 'h2s_ppm': None, 'temperature': -18.0, 'humidity': 40.0}, **values)
+
+
+def test_adaptive_sampler_backs_off_while_stable():
+    sampler = AdaptiveSampler(interval=30, fast_interval=2, slow_interval=100, stable_readings=3, backoff=2.0)
+    intervals = [sampler.next_interval(reading()) for _ in range(9)]
+    assert intervals == [30, 30, 60, 60, 60, 100, 100, 100, 100]
+    assert sampler.reason == 'stable'
+
+
+def test_adaptive_sampler_speeds_up_on_change_or_open_door():
+    sampler = AdaptiveSampler(interval=30, fast_interval=2)
+    sampler.next_interval(reading())
+    assert sampler.next_interval(reading(co2_ppm=400 + 49)) == 30
+    assert sampler.next_interval(reading(co2_ppm=400 + 49 + 50)) == 2
+    assert sampler.reason == 'co2_ppm changing'
+    # Leaving fast mode returns to the normal rate at once
+    assert sampler.next_interval(reading(co2_ppm=499)) == 30
+    assert sampler.next_interval(reading(co2_ppm=499, door_open=True)) == 2
+    assert sampler.reason == 'door open'
+
+
+def test_deadband_sends_a_spike_seen_only_in_the_max():
+    deadband = DeadbandFilter(heartbeat=300)
+    assert deadband.check(reading()) == 'first'
+    assert deadband.check(reading(ammonia_ppm=1.2, ammonia_stats={'max': 1.5})) is None
+    assert deadband.check(reading(ammonia_ppm=1.2, ammonia_stats={'max': 6.0})) == 'ammonia_ppm'
+
+
+def test_deadband_suppresses_small_changes_until_the_heartbeat(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('sensors.time.monotonic', lambda: clock[0])
+    deadband = DeadbandFilter(heartbeat=300)
+    assert deadband.check(reading()) == 'first'
+    assert deadband.check(reading(co2_ppm=420, temperature=-17.6)) is None
+    # Measured against the last reading sent, not the last one seen
+    assert deadband.check(reading(co2_ppm=426)) == 'co2_ppm'
+    assert deadband.check(reading(co2_ppm=426, door_open=True)) == 'door_open'
+    assert deadband.check(reading(co2_ppm=426, door_open=True, humidity=None)) == 'humidity'
+    clock[0] += 300
+    assert deadband.check(reading(co2_ppm=426, door_open=True, humidity=None)) == 'heartbeat'
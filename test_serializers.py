@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Serialization tests for Freezer Inventory System
+Run with: python -m pytest test_serializers.py
+"""
+
+import json
+from flask import Flask
+from serializers import stream_rows
+
+
+def failing_pages():
+    yield [{'id': 1}, {'id': 2}]
+    raise ConnectionError('storage unreachable')
+
+
+def test_streamed_array_ends_with_an_error_marker():
+    with Flask(__name__).test_request_context():
+        rows = json.loads(b''.join(stream_rows(failing_pages()).response))
+    assert rows == [{'id': 1}, {'id': 2}, {'error': 'storage unreachable', 'truncated': True}]
+
+
+def test_streamed_ndjson_ends_with_an_error_line():
+    with Flask(__name__).test_request_context():
+        lines = b''.join(stream_rows(failing_pages(), ndjson=True).response).splitlines()
+    assert [json.loads(line) for line in lines][-1] == {'error': 'storage unreachable', 'truncated': True}
+
+
+def test_complete_stream_has_no_marker():
+    with Flask(__name__).test_request_context():
+        rows = json.loads(b''.join(stream_rows(iter([[{'id': 1}], []])).response))
+    assert rows == [{'id': 1}]
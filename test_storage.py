@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Storage tests for Freezer Inventory System
+Run with: python -m pytest test_storage.py
+Set POSTGRES_TEST_DSN to a scratch database to include the PostgresStorage tests
+"""
+
+import os
+import subprocess
+import sys
+import time
+import pytest
+from storage import CALL_TIMEOUT, CircuitBreaker, PostgresStorage, ResilientStorage, StorageUnavailable, is_outage
+
+# Scratch database for the PostgresStorage tests; its tables are dropped and recreated
+POSTGRES_TEST_DSN = os.environ.get('POSTGRES_TEST_DSN')
+
+
+class FlakyBackend:
+    """Answers reads per device until `down` is set, then raises"""
+
+    def __init__(self):
+        self.down = False
+
+    def door_state_before(self, before, device_id=None):
+        if self.down:
+            raise ConnectionError('storage unreachable')
+        return {'device_id': device_id, 'state': 'open' if device_id == 'A' else 'closed'}
+
+    def sensor_anomalies(self, since, limit, device_id=None):
+        if self.down:
+            raise ConnectionError('storage unreachable')
+        return [{'device_id': device_id}] * limit
+
+
+def resilient(backend, **kwargs):
+    return ResilientStorage(backend, breaker=CircuitBreaker(failure_threshold=100), retries=0, **kwargs)
+
+
+def test_stale_fallback_is_kept_per_device():
+    backend = FlakyBackend()
+    stale = []
+    storage = resilient(backend, on_stale=stale.append)
+    storage.door_state_before('2026-01-01T10:00:00', 'A')
+    storage.door_state_before('2026-01-01T10:00:00', 'B')
+
+    backend.down = True
+    # The window bound moves with every request and still finds the result
+    assert storage.door_state_before('2026-01-01T10:05:00', 'B') == {'device_id': 'B', 'state': 'closed'}
+    assert storage.door_state_before('2026-01-01T10:05:00', 'A') == {'device_id': 'A', 'state': 'open'}
+    assert len(stale) == 2
+
+
+def test_stale_fallback_matches_keyword_arguments():
+    backend = FlakyBackend()
+    storage = resilient(backend)
+    storage.sensor_anomalies('2026-01-01T10:00:00', 2, device_id='A')
+
+    backend.down = True
+    assert storage.sensor_anomalies('2026-01-01T10:01:00', 2, device_id='A') == [{'device_id': 'A'}] * 2
+    # Never fetched for this device or limit: nothing stale to serve
+    with pytest.raises(StorageUnavailable):
+        storage.sensor_anomalies('2026-01-01T10:01:00', 2, device_id='B')
+    with pytest.raises(StorageUnavailable):
+        storage.sensor_anomalies('2026-01-01T10:01:00', 5, device_id='A')
+
+
+class RejectingBackend:
+    """Rejects every insert the way PostgREST rejects a bad row"""
+
+    def insert_sensor(self, sensor_data):
+        from postgrest.exceptions import APIError
+        raise APIError({'code': '23502', 'message': 'null value in column "device_id"'})
+
+    def list_items(self):
+        return [{'id': 1, 'timeout': CALL_TIMEOUT.get()}]
+
+
+def test_stale_fallback_keeps_only_the_most_recently_used_results():
+    backend = FlakyBackend()
+    storage = resilient(backend, max_last_good=2)
+    for device_id in ('A', 'B', 'C'):
+        storage.door_state_before('2026-01-01T10:00:00', device_id)
+    storage.sensor_anomalies('2026-01-01T10:00:00', 1, device_id='B')
+
+    backend.down = True
+    assert len(storage._last_good) == 2
+    with pytest.raises(StorageUnavailable):
+        storage.door_state_before('2026-01-01T10:05:00', 'B')
+    assert storage.door_state_before('2026-01-01T10:05:00', 'C')['device_id'] == 'C'
+
+
+def test_client_errors_do_not_open_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=2)
+    storage = ResilientStorage(RejectingBackend(), breaker=breaker)
+    for _ in range(5):
+        with pytest.raises(Exception):
+            storage.insert_sensor({'co2_ppm': 400})
+    assert breaker.state == 'closed'
+    assert storage.list_items()[0]['id'] == 1
+
+
+def test_outage_classification():
+    from postgrest.exceptions import APIError
+    assert is_outage(TimeoutError())
+    assert is_outage(ConnectionError())
+    assert is_outage(APIError({'code': 503, 'message': 'JSON could not be generated'}))
+    assert is_outage(APIError({'code': 'PGRST000', 'message': 'Could not connect'}))
+    assert is_outage(APIError({'code': '57014', 'message': 'canceling statement due to statement timeout'}))
+    assert not is_outage(APIError({'code': 400, 'message': 'JSON could not be generated'}))
+    assert not is_outage(APIError({'code': '23505', 'message': 'duplicate key value'}))
+    assert not is_outage(APIError({'code': 'PGRST204', 'message': 'Column not found'}))
+    assert not is_outage(ValueError('bad payload'))
+
+
+def test_deadline_is_passed_down_as_the_call_timeout():
+    storage = ResilientStorage(RejectingBackend(), deadline=1.5)
+    timeout = storage.list_items()[0]['timeout']
+    assert 0 < timeout <= 1.5
+    assert CALL_TIMEOUT.get() is None
+
+
+@pytest.fixture
+def postgres():
+    """PostgresStorage on empty tables created from schema.sql"""
+    psycopg2 = pytest.importorskip('psycopg2')
+    if not POSTGRES_TEST_DSN:
+        pytest.skip('POSTGRES_TEST_DSN not set')
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')) as f:
+        # The grants name Supabase's roles, which a plain Postgres does not have
+        schema = f.read().split('-- Grant permissions')[0]
+    conn = psycopg2.connect(POSTGRES_TEST_DSN)
+    with conn, conn.cursor() as cur:
+        cur.execute(schema)
+        cur.execute('TRUNCATE inventory_item, sensor_data, door_event RESTART IDENTITY')
+    conn.close()
+    storage = PostgresStorage(POSTGRES_TEST_DSN, max_connections=1, timeout=2)
+    yield storage
+    storage.reset()
+
+
+def item(name, **fields):
+    return dict({'name': name, 'quantity': 1, 'unit': 'pcs'}, **fields)
+
+
+def test_postgres_prepares_statements_once_per_connection(postgres):
+    postgres.insert_item(item('Peas'))
+    assert [row['name'] for row in postgres.list_items()] == ['Peas']
+    assert [row['name'] for row in postgres.list_items()] == ['Peas']
+    with postgres._connection() as conn, conn.cursor() as cur:
+        assert 'list_items' in conn.prepared
+        cur.execute('SELECT name FROM pg_prepared_statements')
+        assert [row[0] for row in cur.fetchall()] == ['list_items']
+
+
+def test_postgres_insert_sensors_uses_copy(postgres):
+    postgres.insert_sensors([
+        {'timestamp': '2026-01-01T10:00:00+00:00', 'co2_ppm': 410.5, 'door_open': False,
+         'ammonia_stats': {'mean': 1.5, 'count': 50}, 'air_quality': 'tab\there'},
+        {'timestamp': '2026-01-01T10:00:30+00:00', 'co2_ppm': None, 'door_open': True, 'device_id': 'B'}
+    ])
+    rows = postgres.sensor_history('2026-01-01T00:00:00+00:00')
+    assert [(row['co2_ppm'], row['door_open'], row['device_id']) for row in rows] == \
+        [(410.5, False, 'default'), (None, True, 'B')]
+    assert rows[0]['ammonia_stats'] == {'mean': 1.5, 'count': 50}
+    assert rows[0]['air_quality'] == 'tab\there'
+    assert rows[0]['timestamp'].startswith('2026-01-01T10:00:00')
+
+
+def test_postgres_streams_pages_from_a_server_side_cursor(postgres):
+    postgres.insert_items([item(f'Item {i}', added_date=f'2026-01-0{i}T00:00:00+00:00') for i in range(1, 6)])
+    pages = list(postgres.iter_items(2))
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [row['name'] for page in pages for row in page] == [f'Item {i}' for i in range(5, 0, -1)]
+    # The stream gave its connection back: the single pool slot is free again
+    assert len(postgres.list_items()) == 5
+    assert list(postgres.iter_sensor_history('2026-01-01T00:00:00+00:00', 2)) == []
+
+
+def test_postgres_insert_items_skips_stored_client_keys(postgres):
+    first = postgres.insert_items([item('Peas', client_key='a'), item('Corn', client_key='b')])
+    assert [row['name'] for row in first] == ['Peas', 'Corn']
+    again = postgres.insert_items([item('Peas', client_key='a'), item('Beans', client_key='c')])
+    assert [row['name'] for row in again] == ['Beans']
+    assert sorted(row['client_key'] for row in postgres.list_items()) == ['a', 'b', 'c']
+
+
+def test_postgres_failed_connect_returns_its_pool_slot(postgres, monkeypatch):
+    import psycopg2.pool
+    pool = postgres.pool
+
+    def refuse():
+        raise psycopg2.pool.PoolError('connection refused')
+    monkeypatch.setattr(pool, 'getconn', refuse)
+    for _ in range(3):
+        with pytest.raises(psycopg2.pool.PoolError):
+            postgres.list_items()
+    monkeypatch.undo()
+    assert postgres.list_items() == []
+
+
+def test_mirror_streams_items_in_pages(tmp_path):
+    from mirror import LocalMirror
+    mirror = LocalMirror(str(tmp_path / 'mirror.db'))
+    mirror.upsert_items([dict(item(f'Item {i}', id=i, added_date=f'2026-01-0{i}T00:00:00'), client_key='k')
+                         for i in range(1, 6)])
+    pages = mirror.iter_items(2)
+    assert [row['name'] for row in next(pages)] == ['Item 5', 'Item 4']
+    # Writes are not held up by a response still being streamed
+    mirror.delete_items([1])
+    rest = list(pages)
+    assert [len(page) for page in rest] == [2, 1]
+    assert 'client_key' not in rest[0][0]
+
+
+def test_only_the_lease_holder_syncs_the_mirror(tmp_path):
+    from mirror import LocalMirror
+    mirror = LocalMirror(str(tmp_path / 'mirror.db'))
+    me, parent = str(os.getpid()), str(os.getppid())
+    assert mirror.claim_sync(parent, 60)
+    assert not mirror.claim_sync(me, 60)
+    assert mirror.claim_sync(parent, 0)
+    # An expired lease is taken over
+    assert mirror.claim_sync(me, 60)
+    assert not mirror.claim_sync(parent, 60)
+    # So is one whose holder has exited
+    dead = subprocess.Popen([sys.executable, '-c', ''])
+    dead.wait()
+    mirror.set_state('sync_lease', f"{dead.pid} {time.time() + 60}")
+    assert mirror.claim_sync(me, 60)
+
+
+def test_write_in_another_worker_wakes_the_lease_holder(tmp_path):
+    from mirror import LocalMirror, MirrorSync
+    path = str(tmp_path / 'mirror.db')
+    holder, writer = (MirrorSync(None, LocalMirror(path), interval=60) for _ in range(2))
+    syncs = []
+    holder.sync = lambda: syncs.append(time.monotonic())
+    holder.tick()
+    holder.tick()
+    assert len(syncs) == 1
+
+    writer.request_sync()
+    holder.tick()
+    assert len(syncs) == 2
+    holder.tick()
+    assert len(syncs) == 2
+
+
+def test_queue_lease_is_checked_and_renewed(tmp_path):
+    from local_queue import DurableQueue
+    queue = DurableQueue(str(tmp_path / 'queue.db'), lease_seconds=0.2)
+    ids = queue.put_many([{'n': 1}, {'n': 2}])
+    assert [row_id for row_id, _ in queue.claim(10, consumer='a')] == ids
+    assert queue.ack(ids, 'b') == 0
+    time.sleep(0.15)
+    assert queue.renew(ids[1:], 'a') == 1
+    time.sleep(0.1)
+    # Only the entry whose lease ran out is handed to another consumer
+    assert [row_id for row_id, _ in queue.claim(10, consumer='b')] == ids[:1]
+    assert queue.ack(ids, 'a') == 1
+    assert queue.release(ids[:1], 'a') == 0
+    assert [payload for _, payload, _ in queue.peek()] == [{'n': 1}]
+
+
+def test_queue_keeps_the_first_payload_per_dedupe_key(tmp_path):
+    import sqlite3
+    from local_queue import DurableQueue
+    path = str(tmp_path / 'queue.db')
+    # A queue file from before dedupe keys
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE queue (id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, '
+               'enqueued_at REAL NOT NULL, claimed_by TEXT, claimed_until REAL)')
+    db.close()
+    queue = DurableQueue(path)
+    first = queue.put({'n': 1}, dedupe_key='k')
+    assert queue.put({'n': 2}, dedupe_key='k') == first
+    assert queue.put({'n': 3}) != queue.put({'n': 3})
+    assert [payload['n'] for _, payload, _ in queue.peek()] == [1, 3, 3]
@@ -30,10 +30,10 @@ def test_imports():
         print("  This is expected if not running on Raspberry Pi")
     
     try:
-        import Adafruit_DHT
-        print("✓ Adafruit_DHT imported successfully")
+        import adafruit_dht
+        print("✓ adafruit_dht imported successfully")
     except ImportError as e:
-        print(f"⚠ Adafruit_DHT import failed: {e}")
+        print(f"⚠ adafruit_dht import failed: {e}")
         print("  This is expected if not running on Raspberry Pi")
     
     return True
@@ -180,7 +180,7 @@ def test_api_endpoints():
                                  data=json.dumps(test_sensor_data),
                                  content_type='application/json')
             
-            if response.status_code == 201:
+            if response.status_code in (201, 202):
                 print("✓ Add sensor data API working")
             else:
                 print(f"✗ Add sensor data API failed: {response.status_code}")
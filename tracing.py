@@ -0,0 +1,188 @@
+"""
+Tracing for Freezer Inventory System
+Lightweight spans shared by the sensor daemon and the Flask app; the trace
+ID travels in the X-Trace-Id header and finished spans are appended to a
+JSON Lines file, so one reading can be followed from the UART to its row
+
+Print the latency breakdown of recent traces with:
+    python tracing.py sensor_traces.jsonl app_traces.jsonl
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+TRACE_HEADER = 'X-Trace-Id'
+PARENT_HEADER = 'X-Parent-Span-Id'
+
+_current = contextvars.ContextVar('current_span', default=None)
+
+
+def new_id(length):
+    return os.urandom(length // 2).hex()
+
+
+def valid_id(value):
+    """True for a hex ID short enough to accept from another service"""
+    return 0 < len(value) <= 64 and all(c in '0123456789abcdef' for c in value.lower())
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ('tracer', 'trace_id', 'span_id', 'parent_id', 'name', 'attributes', 'start', 'duration', 'error')
+
+    def __init__(self, tracer, name, trace_id=None, parent_id=None, attributes=None):
+        self.tracer = tracer
+        self.trace_id = trace_id or new_id(32)
+        self.span_id = new_id(16)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'service': self.tracer.service,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': round(self.duration * 1000, 3),
+            'error': self.error,
+            'attributes': self.attributes
+        }
+
+
+class JsonlExporter:
+    """Append finished spans to a file, one JSON object per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', buffering=1)
+            self._file.write(line)
+
+
+class Tracer:
+    """Creates spans for one service and hands finished ones to an exporter"""
+
+    def __init__(self, service, exporter=None):
+        self.service = service
+        self.exporter = exporter
+
+    def start_span(self, name, trace_id=None, parent_id=None, **attributes):
+        """Open a span and make it current; pass the result to finish_span"""
+        parent = _current.get()
+        if trace_id is None and parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        span = Span(self, name, trace_id, parent_id, attributes)
+        return span, _current.set(span), time.perf_counter()
+
+    def finish_span(self, handle, error=None):
+        span, token, started = handle
+        span.duration = time.perf_counter() - started
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        _current.reset(token)
+        if self.exporter is not None:
+            try:
+                self.exporter.export(span)
+            except OSError:
+                pass
+
+    def record(self, name, trace_id, parent_id, start, duration, error=None, **attributes):
+        """Export a span for work already done, such as a batch written on behalf of a queued request"""
+        span = Span(self, name, trace_id, parent_id, attributes)
+        span.start = start
+        span.duration = duration
+        span.error = error
+        if self.exporter is not None:
+            try:
+                self.exporter.export(span)
+            except OSError:
+                pass
+
+    @contextlib.contextmanager
+    def span(self, name, trace_id=None, parent_id=None, **attributes):
+        handle = self.start_span(name, trace_id, parent_id, **attributes)
+        try:
+            yield handle[0]
+        except BaseException as e:
+            self.finish_span(handle, e)
+            raise
+        self.finish_span(handle)
+
+
+def current_span():
+    return _current.get()
+
+
+def span(name, **attributes):
+    """Child of the current span, or a no-op when nothing is being traced"""
+    parent = _current.get()
+    if parent is None:
+        return contextlib.nullcontext()
+    return parent.tracer.span(name, **attributes)
+
+
+def trace_headers():
+    """Headers that continue the current trace in another service"""
+    parent = _current.get()
+    if parent is None:
+        return {}
+    return {TRACE_HEADER: parent.trace_id, PARENT_HEADER: parent.span_id}
+
+
+def print_breakdown(paths, limit=20):
+    """Print the span tree of the most recent traces found in the files"""
+    spans = []
+    for path in paths:
+        with open(path) as f:
+            spans.extend(json.loads(line) for line in f if line.strip())
+
+    traces = {}
+    for record in spans:
+        traces.setdefault(record['trace_id'], []).append(record)
+
+    recent = sorted(traces.values(), key=lambda records: min(r['start'] for r in records))[-limit:]
+    for records in recent:
+        children = {}
+        ids = {r['span_id'] for r in records}
+        for r in sorted(records, key=lambda r: r['start']):
+            parent = r['parent_id'] if r['parent_id'] in ids else None
+            children.setdefault(parent, []).append(r)
+
+        print(f"trace {records[0]['trace_id']}")
+
+        def show(parent, depth):
+            for r in children.get(parent, []):
+                error = f"  ERROR {r['error']}" if r['error'] else ''
+                print(f"  {'  ' * depth}{r['service']}:{r['name']}  {r['duration_ms']:.1f} ms{error}")
+                show(r['span_id'], depth + 1)
+
+        show(None, 0)
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python tracing.py TRACE_FILE [TRACE_FILE ...]")
+        sys.exit(1)
+    print_breakdown(sys.argv[1:])
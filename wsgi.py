@@ -0,0 +1,10 @@
+"""
+WSGI entry point for Freezer Inventory System
+Serves the production configuration, e.g. gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+
+os.environ.setdefault('FLASK_CONFIG', 'production')
+
+from app import app